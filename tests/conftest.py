@@ -0,0 +1,70 @@
+# 수행.py 는 패키지가 아니라서 파일 경로로 불러옴
+import importlib.util
+import os
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+
+_spec = importlib.util.spec_from_file_location("suhaeng", os.path.join(os.path.dirname(HERE), "수행.py"))
+SUHAENG = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(SUHAENG)
+
+# 테스트마다 빈 캐시 (디스크 캐시 / 지난 테스트 결과 안 씀)
+@pytest.fixture
+def m(monkeypatch):
+    monkeypatch.setattr(SUHAENG, "LINK_CACHE", SUHAENG.LinkCache(":memory:"))
+    monkeypatch.setattr(SUHAENG, "QUERY_CACHE", SUHAENG.QueryCache())
+    return SUHAENG
+
+# api_request 대신 쓰는 작은 위키 (formatversion=2 응답 모양). links = {문서: [링크]}, redirects = {넘겨주기 문서: 원래 문서}
+# 넘겨주기 문서도 실제처럼 원래 문서의 linkshere 에 나옴. limit 넘는 링크는 continue 로 나눠 줌
+class FakeWiki:
+    def __init__(self, links, redirects=None, limit=None):
+        self.links = links
+        self.redirects = redirects or {}
+        self.limit = limit
+        self.fail_continue = False   # True 면 continue 요청이 오면 실패 (재시도 다 해도 못 받은 것처럼)
+        self.requests = 0
+
+    def linkshere(self, title):
+        pages = [page for page, links in self.links.items() if title in links]
+        return pages + [alias for alias, target in self.redirects.items() if target == title]
+
+    def __call__(self, params, stats, cancel=None):
+        if cancel is not None: cancel.charge()   # 진짜 api_request 처럼 보내기 전에 시간/요청 예산 확인
+        self.requests += 1
+        prop = params.get("prop"); pre = SUHAENG.PREFIX.get(prop)
+        offset = int(params.get(pre + "continue", 0)) if pre else 0
+        if offset and self.fail_continue: raise SUHAENG.FetchError("HTTP 503")
+        query = {"pages": [], "redirects": []}
+        more = False
+        for title in params["titles"].split("|"):
+            if params.get("redirects") and title in self.redirects:
+                query["redirects"].append({"from": title, "to": self.redirects[title]}); title = self.redirects[title]
+            if title not in self.links and title not in self.redirects:
+                query["pages"].append({"ns": 0, "title": title, "missing": True}); continue
+            page = {"pageid": 1, "ns": 0, "title": title}
+            if prop == "links": found = [{"ns": 0, "title": link} for link in self.links.get(title, [])]
+            elif prop == "linkshere":
+                found = [{"ns": 0, "title": link} for link in self.linkshere(title)]
+                if "redirect" in params.get("lhprop", ""):
+                    for link in found: link["redirect"] = link["title"] in self.redirects
+            else: found = None
+            if found is not None:
+                if self.limit: more = more or len(found) > offset + self.limit; found = found[offset:offset + self.limit]
+                page[prop] = found
+            query["pages"].append(page)
+        data = {"query": query}
+        if more: data["continue"] = {pre + "continue": str(offset + self.limit), "continue": "||"}
+        else: data["batchcomplete"] = True
+        return data
+
+@pytest.fixture
+def wiki(m, monkeypatch):
+    def install(links, redirects=None, limit=None):
+        fake = FakeWiki(links, redirects, limit)
+        monkeypatch.setattr(m, "api_request", fake)
+        return fake
+    return install
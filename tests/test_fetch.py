@@ -0,0 +1,86 @@
+# keep-alive 연결 재사용 / 재연결
+import http.client
+import json
+import time
+
+import pytest
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status = 200
+        self._body = json.dumps(data).encode("utf-8")
+
+    def getheader(self, name, default=None):
+        return default
+
+    def read(self, size=-1):
+        body, self._body = self._body, b""
+        return body
+
+class FakeConnection:
+    opened = []
+
+    def __init__(self, host, timeout=None, fail=None):
+        self.fail = fail
+        FakeConnection.opened.append(self)
+
+    def request(self, method, path, headers=None):
+        if self.fail == "request": raise http.client.RemoteDisconnected("closed")
+
+    def getresponse(self):
+        if self.fail == "timeout": raise TimeoutError("timed out")
+        return FakeResponse({"batchcomplete": True, "query": {}})
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def conns(m, monkeypatch):
+    monkeypatch.setattr(m, "API", "http://wiki.test/w/api.php")
+    monkeypatch.setattr(http.client, "HTTPConnection", FakeConnection)
+    FakeConnection.opened = []
+    m._local.conns = {}
+    yield m._local.conns
+    m._local.conns = {}
+
+def test_stale_keepalive_reconnects_once(m, conns):
+    conns["wiki.test"] = FakeConnection("wiki.test", fail="request")
+    assert m._http_get_json({}, m.RunStats()) == {"batchcomplete": True, "query": {}}
+    assert len(FakeConnection.opened) == 2
+
+def test_timeout_goes_to_counted_retry(m, conns):
+    conns["wiki.test"] = FakeConnection("wiki.test", fail="timeout")
+    with pytest.raises(m.FetchError) as e:
+        m._http_get_json({}, m.RunStats())
+    assert e.value.retryable and len(FakeConnection.opened) == 1
+
+def test_new_connection_failure_not_repeated(m, conns, monkeypatch):
+    monkeypatch.setattr(http.client, "HTTPConnection", lambda host, timeout=None: FakeConnection(host, fail="request"))
+    with pytest.raises(m.FetchError):
+        m._http_get_json({}, m.RunStats())
+    assert len(FakeConnection.opened) == 1
+
+# --workers 는 샤드 확장하는 동안만 부모 몫을 줄임 (작은 프론티어 탐색은 원래 속도)
+def test_shard_workers_split_rate_only_while_sharding(m, monkeypatch):
+    monkeypatch.setattr(m, "SHARD_WORKERS", 0)
+    limiter = m.RATE_LIMITER
+    m.use_shard_workers(3)
+    assert m.RATE_LIMITER is limiter and limiter.rate == m.RATE_LIMIT
+    limiter = m.RateLimiter(1000, 1)
+    assert limiter.acquire() == 0.0
+    with limiter.shared(4):
+        with limiter.shared(4): pass
+        assert limiter.acquire() > 0    # 나눠 쓰는 중 - 버스트 1/4, 초당 250
+    time.sleep(0.01)
+    assert limiter.acquire() == 0.0
+
+# 링크 캐시 파일은 처음 쓸 때 생김 (모듈 불러오기만 해서는 안 생김). 받은 묶음은 커밋 한 번으로 저장
+def test_link_cache_opens_on_first_use(m, tmp_path, monkeypatch):
+    path = tmp_path / "links.sqlite3"
+    monkeypatch.setattr(m, "LINK_CACHE", m.LinkCache(str(path)))
+    assert not path.exists()
+    statements = []
+    m.LINK_CACHE.db.set_trace_callback(statements.append)
+    m._store_chunk({"가": ["나"], "다": []}, True, "links")
+    assert path.exists() and m.LINK_CACHE.get("가", "links") == ["나"] and m.LINK_CACHE.get("다", "links") == []
+    assert statements.count("COMMIT") == 1
@@ -0,0 +1,44 @@
+# 실시간 그래프 폴링 - 화면 없이 after 예약만 흉내냄
+import queue
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = {}
+        self.next_id = 0
+
+    def after(self, ms, func):
+        self.next_id += 1
+        self.scheduled[self.next_id] = func
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.scheduled.pop(after_id, None)
+
+    def run_pending(self):
+        pending, self.scheduled = self.scheduled, {}
+        for func in pending.values(): func()
+
+class FakeFrame:
+    def winfo_children(self):
+        return []
+
+def make_app(m):
+    app = m.ModernWikiApp.__new__(m.ModernWikiApp)
+    app.root = FakeRoot()
+    app.canvas_frame = app.toolbar_frame = FakeFrame()
+    app.progress_queue = queue.Queue()
+    app.live_view = None
+    app.live_polling = False
+    app.live_after = None
+    return app
+
+# 첫 시도가 실패해서 같은 호출 안에서 다시 시작해도 폴링 루프는 하나
+def test_restart_keeps_single_poll_loop(m):
+    app = make_app(m)
+    app.start_live_view("S", "T")
+    app.start_live_view("S", "T")
+    assert len(app.root.scheduled) == 1
+    app.root.run_pending()
+    assert len(app.root.scheduled) == 1
+    app._finish_live_view()
+    assert not app.root.scheduled and not app.live_polling
@@ -0,0 +1,40 @@
+# 작은 덤프 -> CSR -> 오프라인 탐색
+import pytest
+
+PAGE = "INSERT INTO `page` VALUES (1,0,'가',0,0),(2,0,'나',0,0),(3,0,'다',0,0),(4,0,'라_마',0,0),(5,0,'넘김',1,0),(6,1,'가',0,0);\n"
+OLD_LINKS = "INSERT INTO `pagelinks` VALUES (1,0,'나',0),(2,0,'다',0),(3,0,'라_마',0),(1,0,'넘김',0),(1,1,'다',0);\n"
+REDIRECT = "INSERT INTO `redirect` VALUES (5,0,'다','','');\n"
+LINKTARGET = "INSERT INTO `linktarget` VALUES (10,0,'나'),(11,0,'다'),(12,0,'라_마'),(13,1,'다');\n"
+NEW_LINKS = "INSERT INTO `pagelinks` VALUES (1,0,10),(2,0,11),(3,0,12),(1,0,13);\n"
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def build(m, tmp_path, links, **dumps):
+    out = str(tmp_path / "test.csr")
+    m.build_offline_graph(write(tmp_path, "page.sql", PAGE), write(tmp_path, "pagelinks.sql", links), out, log_func=lambda message: None,
+                          **{key: write(tmp_path, key + ".sql", text) for key, text in dumps.items()})
+    return m.OfflineGraph(out)
+
+def test_old_schema_round_trip(m, tmp_path):
+    graph = build(m, tmp_path, OLD_LINKS)
+    assert (graph.n, graph.e) == (4, 3)   # 넘겨주기 문서, 다른 이름공간은 빠짐
+    path, _ = m.find_shortest_path_offline(graph, "가", "라_마", lambda message: None)
+    assert path == ["가", "나", "다", "라 마"]
+    assert m.find_shortest_path_offline(graph, "라 마", "가", lambda message: None)[0] is None
+
+def test_redirect_links_collapsed(m, tmp_path):
+    graph = build(m, tmp_path, OLD_LINKS, redirect_dump=REDIRECT)
+    path, _ = m.find_shortest_path_offline(graph, "가", "라 마", lambda message: None, bidirectional=False)
+    assert path == ["가", "다", "라 마"]
+
+def test_new_schema_with_linktarget(m, tmp_path):
+    graph = build(m, tmp_path, NEW_LINKS, linktarget_dump=LINKTARGET)
+    assert graph.e == 3
+    assert m.find_shortest_path_offline(graph, "가", "라 마", lambda message: None)[0] == ["가", "나", "다", "라 마"]
+
+def test_new_schema_without_linktarget_fails(m, tmp_path):
+    with pytest.raises(ValueError, match="linktarget"):
+        build(m, tmp_path, NEW_LINKS)
@@ -0,0 +1,72 @@
+# 가짜 위키로 온라인 탐색 (네트워크 안 씀)
+LINKS = {"S": ["A", "B"], "A": ["C"], "B": ["D"], "C": ["T"], "D": ["U"], "T": [], "U": []}
+
+def quiet(message):
+    pass
+
+def test_bidirectional_shortest(m, wiki):
+    wiki(LINKS)
+    assert m.find_shortest_path("S", "T", quiet)[0] == ["S", "A", "C", "T"]
+    assert m.find_shortest_path_forward_only("S", "U", quiet)[0] == ["S", "B", "D", "U"]
+
+# 제목 번호는 탐색마다 따로라서 캐시된 트리는 제목으로 들고 다님
+def test_cached_tree_reused_by_next_search(m, wiki):
+    fake = wiki(LINKS)
+    m.find_shortest_path("S", "T", quiet)
+    assert not hasattr(m, "TITLES")
+    parents = m.QUERY_CACHE.get_tree("S", "links")[0]
+    assert parents["S"] is None and all(isinstance(title, str) for title in parents)
+    before = fake.requests
+    assert m.find_shortest_path("S", "U", quiet)[0] == ["S", "B", "D", "U"]
+    assert m.QUERY_CACHE.get_path("S", "T") == ["S", "A", "C", "T"]
+    assert fake.requests > before
+
+def test_title_table_visible_after_append(m):
+    titles = m.TitleTable()
+    assert [titles.intern(title) for title in "가나가"] == [0, 1, 0]
+    assert titles.title(titles.ids["나"]) == "나" and len(titles) == 2
+
+# linkshere 에 나오는 넘겨주기 문서가 교차점이 되면 안 됨 (S -> R(넘겨주기) = C -> T)
+# 역방향을 먼저 두 단계 보게 만들어서 R 이 역방향 트리에 들어간 뒤에 정방향이 R 을 만나게 함
+def test_redirect_page_not_meeting_point(m, wiki):
+    links = {"S": ["R"], "C": ["T"], "T": []}
+    links.update({f"Q{i}": ["C"] for i in range(200)})
+    wiki(links, {"R": "C"})
+    m.LINK_CACHE.put("T", "linkshere", ["C"])
+    assert m.find_shortest_path("S", "T", quiet)[0] == ["S", "C", "T"]
+    assert m.find_distances_from("S", ["T"], quiet, backward_depth=1)["T"]["path"] == ["S", "C", "T"]
+
+# 링크 받다가 실패한 문서는 저장한 그래프에서 다 받은 걸로 표시하면 안 됨 (잘린 목록이 캐시로 들어감)
+def test_failed_page_not_seeded(m, wiki, tmp_path):
+    fake = wiki({"S": ["A", "T"], "A": ["B"], "B": ["T"], "T": []}, limit=1)   # S 는 첫 링크만 받고 실패
+    fake.fail_continue = True
+    stats = m.RunStats()
+    path, G = m.find_shortest_path("S", "T", quiet, want_graph=True, stats=stats)
+    assert path == ["S", "A", "B", "T"] and stats.failed_pages == ["S"]
+    m.save_search_graph(str(tmp_path / "search.bin"), G, path, stats)
+    cache = m.LinkCache(":memory:")
+    m.SavedSearchGraph(str(tmp_path / "search.bin")).seed(cache)
+    assert cache.get("S", "links") is None
+    assert cache.get("A", "links") == ["B"]
+
+# 정방향이 찾은 별칭 R 의 원래 문서 C 가 이미 역방향 트리에 있으면 그 단계에서 만나야 함
+# (다음 확장까지 미루면 비용 비교로 역방향이 먼저 돌아서 더 긴 S -> X -> Y -> T 가 나옴)
+def test_alias_meeting_found_in_same_level(m, wiki):
+    links = {"S": ["R", "X"], "X": ["Y"] + [f"Z{i}" for i in range(50)], "Y": ["T"], "C": ["T"], "T": []}
+    wiki(links, {"R": "C"})
+    m.LINK_CACHE.put("X", "links", links["X"])
+    m.LINK_CACHE.put("T", "linkshere", ["Y", "C"])
+    assert m.find_shortest_path("S", "T", quiet)[0] == ["S", "C", "T"]
+    assert m.find_shortest_path_forward_only("S", "T", quiet)[0] == ["S", "C", "T"]
+
+# 넘겨주기 확인 전에 시간/요청 수가 다 돼도 목표마다 null 결과가 나와야 함
+def test_distances_cancelled_before_resolve(m, wiki):
+    fake = wiki(LINKS)
+    for cancel in (m.CancelToken(max_requests=0), m.CancelToken(timeout=1e-9)):
+        records = []
+        stats = m.RunStats()
+        results = m.find_distances_from("S", ["T", "U", "T"], quiet, on_result=records.append, stats=stats, cancel=cancel)
+        assert stats.cancelled
+        assert sorted(results) == ["T", "U"] and all(record["distance"] is None for record in results.values())
+        assert len(records) == 3
+    assert fake.requests == 0
@@ -0,0 +1,35 @@
+# 경로 확인 - 저장해 둔 HTML 로 본문 링크 찾기
+import os
+
+from conftest import FIXTURES
+
+def read_fixture(title):
+    with open(os.path.join(FIXTURES, title + ".html"), encoding="utf-8") as f: return f.read()
+
+def parse(m, title):
+    parser = m.ContentLinkParser()
+    parser.feed(read_fixture(title))
+    return parser.links
+
+def test_parser_only_content_links(m):
+    links = parse(m, "가")
+    assert links == {"나": False, "넘김": True, "마 바": False}   # 빨간 링크, 본문 밖(메뉴, 바닥글) 링크는 빠짐
+
+def test_verify_found_and_missing(m, wiki):
+    wiki({"가": ["나"], "나": ["가"]})
+    messages = []
+    assert m.verify_path_links(["가", "나", "가"], read_fixture, messages.append) == ["나", "가"]
+    assert m.verify_path_links(["가", "사"], read_fixture, messages.append) == [None]   # 바닥글에만 있음
+    assert m.verify_path_links(["가", "라"], read_fixture, messages.append) == [None]   # 메뉴에만 있음
+    assert messages == [" [확인] '가' 본문에 '사' 링크 없음", " [확인] '가' 본문에 '라' 링크 없음"]
+
+def test_verify_redirect_alias(m, wiki):
+    wiki({"가": ["나", "다"], "다": []}, {"넘김": "다"})
+    assert m.verify_path_links(["가", "다"], read_fixture) == ["넘김"]   # 경로는 원래 문서, 누를 링크는 넘겨주기
+    assert m.verify_path_links(["가", "없는문서"], read_fixture) == [None]
+
+def test_verify_fetch_error(m):
+    def fail(title): raise OSError("연결 끊김")
+    messages = []
+    assert m.verify_path_links(["가", "나"], fail, messages.append) == [None]
+    assert messages[0] == " [확인] '가' 문서를 못 받음: 연결 끊김"
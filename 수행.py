@@ -1,26 +1,63 @@
 # 임포트 쭉
+import time
+STARTED = time.perf_counter()    # 시작 시간 측정용 (창 뜰 때까지 걸린 시간)
 import sys
 import subprocess
-import time
 import json
-import urllib.request
 import urllib.parse
-from collections import deque
+import http.client
+import asyncio
+import contextlib
 import concurrent.futures
 import threading
 import random
-try:
+import os
+import sqlite3
+import re
+import gzip
+import mmap
+import array
+import struct
+import bisect
+import queue
+import collections
+import itertools
+import zlib
+import io
+import html.parser
+
+# GUI 용 모듈은 GUI 켤 때만 불러옴 (명령줄 실행은 tkinter / matplotlib 없이 돌아감)
+# matplotlib / networkx / numpy / selenium 은 그 기능 처음 쓸 때 불러옴 (pyplot 안 쓰고 Figure 에 바로 그려서 backend 설정도 필요 없음)
+tk = messagebox = ctk = None
+
+def load_gui_modules():
+    global tk, messagebox, ctk
     import tkinter as tk
     from tkinter import messagebox
     import customtkinter as ctk  #GUI 새로운거 안되면 위에걸로 기본 UI 만들기
-    
-    import matplotlib 
-    matplotlib.use("TkAgg")
-    from matplotlib.figure import Figure
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-    import networkx as nx
-except ImportError:
-    pass
+
+# 창 뜬 다음 백그라운드에서 미리 불러둠 - 첫 탐색 끝나고 그래프 그릴 때 안 기다리게
+WARM_MODULES = ["numpy", "networkx", "matplotlib.figure", "matplotlib.collections", "matplotlib.backends.backend_tkagg"]
+
+def warm_imports(modules=WARM_MODULES):
+    import importlib
+    for module in modules:
+        try: importlib.import_module(module)
+        except ImportError: pass
+
+# 무거운 모듈 import 시간 - 모듈마다 새 프로세스에서 -X importtime 으로 (처음 불러올 때 시간)
+STARTUP_MODULES = ["tkinter", "customtkinter", "numpy", "networkx", "matplotlib.figure", "matplotlib.backends.backend_tkagg", "selenium.webdriver"]
+
+def measure_import_times(modules=STARTUP_MODULES, log_func=print):
+    log_func(f" [import] 이 파일 로드 {(time.perf_counter() - STARTED) * 1000:.0f}ms")
+    times = {}
+    for module in modules:
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True)
+        lines = [line for line in proc.stderr.splitlines() if line.startswith("import time:") and "|" in line]
+        # 마지막 줄 = 요청한 모듈, 두번째 칸 = 하위 모듈 포함 누적 (us)
+        times[module] = int(lines[-1].split("|")[1]) / 1e6 if proc.returncode == 0 and lines else None
+        log_func(f" [import] {module:<35} " + (f"{times[module] * 1000:7.0f}ms" if times[module] is not None else "    없음"))
+    return times
 
 # ==============
 # 내부 탐색 & 시연
@@ -28,265 +65,2129 @@ except ImportError:
 
 
 # 중요 변수
-THREADS = 25
-DELAY = 2
+DELAY = 2     # 재시도 대기 시작값 (초)
 
 WIKI = "https://ko.wikipedia.org/wiki/"   # 기본 페이지
 API = "https://ko.wikipedia.org/w/api.php"    # api 키
 PACKAGES = ["selenium", "webdriver-manager", "networkx", "customtkinter", "packaging", "matplotlib"]
 
+# 링크 캐시 (실행할 때마다 같은 허브 문서 다시 받지 않게)
+CACHE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wiki_links_cache.sqlite3")
+CACHE_TTL = 7 * 24 * 3600     # 일주일 지나면 다시 받기
+CACHE_MAX_ROWS = 200000       # 이거 넘으면 오래된 것부터 삭제
+
 
-# 라이브러리 다운 
+# pip 이름이랑 import 이름이 다른 것
+PACKAGE_MODULES = {"webdriver-manager": "webdriver_manager"}
+
+# import 안 하고 설치돼 있는지만 확인 (selenium 같은 건 import 만 해도 느림)
+def missing_packages(packages):
+    import importlib.util
+    return [package for package in packages if importlib.util.find_spec(PACKAGE_MODULES.get(package, package)) is None]
+
+# 라이브러리 다운 - 프로그램 켤 때 한 번만 (탐색 중에는 pip 안 돌림)
 def install_packages(packages, log_func):
+    missing = missing_packages(packages)
+    if not missing: return True
     log_func("--- [ 0. 필수 라이브러리 확인 ] ---")
     success = True
-    for package in packages:
+    for package in missing:
+        log_func(f"[설치] '{package}'가 없습니다. 설치 시작")
         try:
-            __import__(package)
-            log_func(f"[OK] '{package}' 라이브러리 확인")
-        except ImportError:
-            log_func(f"[설치] '{package}'가 없습니다. 설치 시작")
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-                log_func(f"[완료] '{package}' 설치 성공.")
-            except subprocess.CalledProcessError:
-                log_func(f"[실패] '{package}' 설치 실패.")
-                success = False
+            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+            log_func(f"[완료] '{package}' 설치 성공.")
+        except subprocess.CalledProcessError:
+            log_func(f"[실패] '{package}' 설치 실패.")
+            success = False
+    import importlib
+    importlib.invalidate_caches()
     return success
 
+# 문서 제목 정규화 (밑줄 -> 공백, 첫 글자 대문자) - 위키 API 규칙이랑 같게
+def normalize_title(title):
+    title = " ".join(title.replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+# 디스크 링크 캐시 - (방향, 정규화 제목) -> 링크 목록
+# direction 은 API prop 이름 그대로 씀 ("links" = 나가는 링크, "linkshere" = 들어오는 링크)
+class LinkCache:
+    def __init__(self, path=CACHE_DB, ttl=CACHE_TTL, max_rows=CACHE_MAX_ROWS):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._db = None
+
+    # 처음 쓸 때 파일을 엶 - 모듈만 불러와서는 (테스트, 다른 캐시로 바꿔 쓰는 경우) 파일이 안 생김
+    @property
+    def db(self):
+        if self._db is None:
+            with self._open_lock:
+                if self._db is None: self._db = self._connect()
+        return self._db
+
+    def _connect(self):
+        try:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error:
+            db = sqlite3.connect(":memory:", check_same_thread=False)   # 파일 못 쓰면 메모리로
+        db.execute("CREATE TABLE IF NOT EXISTS links (direction TEXT, title TEXT, n INTEGER, links TEXT, fetched REAL, PRIMARY KEY (direction, title))")
+        db.execute("CREATE INDEX IF NOT EXISTS links_fetched ON links (fetched)")
+        db.execute("CREATE TABLE IF NOT EXISTS titles (title TEXT PRIMARY KEY, canonical TEXT, fetched REAL)")   # 넘겨주기/정규화 결과
+        db.commit()
+        return db
+
+    def get(self, title, direction):
+        key = normalize_title(title)
+        with self._lock:
+            row = self.db.execute("SELECT links, fetched FROM links WHERE direction=? AND title=?", (direction, key)).fetchone()
+            if row is None or time.time() - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0].split("\n") if row[0] else []
+
+    def put(self, title, direction, links):
+        key = normalize_title(title)
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?)", (direction, key, len(links), "\n".join(links), time.time()))
+            self.db.commit()
+            self._puts += 1
+            if self._puts % 1000 == 0: self._evict()
+
+    # 한번에 여러 개 - 트랜잭션 한 번 (받은 묶음 저장, 저장해둔 탐색 그래프 불러올 때). fetched = 받은 시각 (기본 지금)
+    def put_many(self, direction, mapping, fetched=None):
+        fetched = time.time() if fetched is None else fetched
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?)", [(direction, normalize_title(title), len(links), "\n".join(links), fetched) for title, links in mapping.items()])
+            self.db.commit()
+            before = self._puts; self._puts += len(mapping)
+            if self._puts // 1000 != before // 1000: self._evict()   # put 이랑 같은 주기
+
+    def _evict(self):
+        self.db.execute("DELETE FROM links WHERE fetched < ?", (time.time() - self.ttl,))
+        self.db.execute("DELETE FROM titles WHERE fetched < ?", (time.time() - self.ttl,))
+        count = self.db.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+        if count > self.max_rows:
+            self.db.execute("DELETE FROM links WHERE rowid IN (SELECT rowid FROM links ORDER BY fetched LIMIT ?)", (count - self.max_rows,))
+        self.db.commit()
+
+    def evict(self):
+        with self._lock: self._evict()
+
+    # 링크 수만 조회 (적중/미스 안 셈) - 탐색 방향 고를 때 씀
+    def degrees(self, titles, direction):
+        keys = list(dict.fromkeys(normalize_title(t) for t in titles))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                rows = self.db.execute(f"SELECT title, n FROM links WHERE direction=? AND fetched>=? AND title IN ({','.join('?' * len(part))})", (direction, time.time() - self.ttl, *part))
+                found.update(rows)
+        return found
+
+    # 제목 -> 원래 문서 제목 (넘겨주기 따라가고 정규화한 것). 모르는 제목은 결과에 없음
+    def get_canonical(self, titles):
+        keys = list(dict.fromkeys(titles))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                rows = self.db.execute(f"SELECT title, canonical FROM titles WHERE fetched>=? AND title IN ({','.join('?' * len(part))})", (time.time() - self.ttl, *part))
+                found.update(rows)
+        return found
+
+    def put_canonical(self, mapping):
+        now = time.time()
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO titles VALUES (?, ?, ?)", [(title, canonical, now) for title, canonical in mapping.items()])
+            self.db.commit()
+
+    def stats(self):
+        return self.hits, self.misses
+
+LINK_CACHE = LinkCache()
+
+def log_cache_stats(log_func, before):
+    hits, misses = LINK_CACHE.stats()
+    hits -= before[0]; misses -= before[1]
+    total = hits + misses
+    rate = (100.0 * hits / total) if total else 0.0
+    log_func(f" [캐시] 적중 {hits}회 / 미스 {misses}회 ({rate:.1f}%)")
+
 # 페이지 링크 가져오기 by. wiki
-def get_links_from_page(page_title):
-    links = set()
-    WIKI_params = {"action": "query", "titles": page_title, "prop": "links", "plnamespace": 0, "pllimit": "max", "format": "json", "redirects": 1}
+# 한 번에 최대 50개 문서를 | 로 묶어서 요청 (API 제한)
+BATCH = 50
+PREFIX = {"links": "pl", "linkshere": "lh"}
+HEADERS = {'User-Agent': 'WikiGameBot/2.0'}
+API_HEADERS = dict(HEADERS, **{'Accept-Encoding': 'gzip'})   # API 응답만 압축해서 받음 (HTML 은 urllib 라 그대로)
+# formatversion=2: 문서 목록이 dict 대신 list, 한글을 \uXXXX 안 하고 UTF-8 그대로 (응답 크기, 파싱 시간 절반 정도)
+API_FORMAT = {"format": "json", "formatversion": 2}
+READ_CHUNK = 64 * 1024   # 받는 대로 압축 풀기
+
+# 요청 속도 제한 / 재시도
+RATE_LIMIT = 20      # 초당 요청 수 (전체 공유)
+RATE_BURST = 40      # 한번에 몰아서 보낼 수 있는 양
+MAX_RETRIES = 5
+BACKOFF_MAX = 30     # 재시도 대기 최대 (초). 시작은 DELAY 초에서 두배씩
+MAXLAG = 5           # 위키 DB 복제 지연이 이거 넘으면 서버가 거절함 -> 기다렸다 재시도
+
+class FetchError(Exception):
+    def __init__(self, message, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+# 취소 / 시간 초과 / 요청 수 초과 - 실패(FetchError)랑 달리 잡아서 재시도하지 않고 탐색까지 그대로 올라감
+class SearchCancelled(Exception):
+    pass
+
+# 토큰 버킷 - 모든 스레드가 같이 씀. 토큰 없으면 생길 때까지 기다림
+class RateLimiter:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._parts = 1        # 샤드 워커랑 나눠 쓰는 중이면 몫 수 (부모 몫은 1/parts)
+        self._sharing = 0
+
+    def acquire(self, cancel=None):
+        with self._lock:
+            now = time.monotonic()
+            rate, burst = self.rate / self._parts, self.burst / self._parts
+            self._tokens = min(burst, self._tokens + (now - self._last) * rate)
+            self._last = now
+            self._tokens -= 1      # 미리 예약 (음수면 그만큼 기다림)
+            wait = -self._tokens / rate if self._tokens < 0 else 0.0
+        if wait: (cancel.sleep if cancel else time.sleep)(wait)
+        return wait
+
+    # 샤드 확장이 도는 동안만 parts 몫으로 나눔 (여러 탐색이 같이 샤드 쓰면 마지막 게 끝날 때 원래대로)
+    @contextlib.contextmanager
+    def shared(self, parts):
+        with self._lock: self._sharing += 1; self._parts = parts
+        try: yield
+        finally:
+            with self._lock:
+                self._sharing -= 1
+                if not self._sharing: self._parts = 1
+
+RATE_LIMITER = RateLimiter(RATE_LIMIT, RATE_BURST)
+
+# 탐색 취소 토큰 - 취소 버튼, 시간 제한(초), 요청 수 제한. cancel() 은 아무 스레드에서 불러도 됨
+# 요청 보내기 전, 기다리는 중, 단계마다 확인해서 SearchCancelled 를 던짐
+CANCEL_POLL = 0.1          # 응답 기다리는 동안 취소 확인 간격 (초)
+SEARCH_TIMEOUT = 300       # GUI 탐색 한 번 시간 제한 (초)
+SEARCH_MAX_REQUESTS = 5000 # GUI 탐색 한 번 요청 수 제한 (1차 + 2차 합쳐서)
+
+class CancelToken:
+    def __init__(self, timeout=None, max_requests=None):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.max_requests = max_requests
+        self.requests = 0
+        self.reason = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self, reason="사용자 취소"):
+        with self._lock:
+            if self.reason is None: self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline: self.cancel("시간 초과")
+        return self._event.is_set()
+
+    def check(self):
+        if self.cancelled: raise SearchCancelled(self.reason)
+
+    # 요청 보낼 때마다 - 예산 넘으면 취소 (샤드 워커가 보낸 건 끝나고 한꺼번에)
+    def charge(self, count=1):
+        self.check()
+        with self._lock:
+            self.requests += count
+            over = self.max_requests is not None and self.requests > self.max_requests
+        if over: self.cancel(f"요청 {self.max_requests}회 초과"); self.check()
+
+    # time.sleep 대신 - 기다리는 중에 취소되면 바로 깸
+    def sleep(self, seconds):
+        if self.deadline is not None: seconds = min(seconds, max(0.0, self.deadline - time.monotonic()))
+        self._event.wait(seconds)
+        self.check()
+
+# 탐색 한 번 동안의 요청 통계 + 측정값 (단계별 프론티어, 응답 시간 분포, 받은 바이트, 파싱/그래프/그리기 시간)
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)   # 응답 시간 히스토그램 경계 (초)
+
+class RunStats:
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0.0     # 속도 제한 + 재시도로 기다린 시간 (초)
+        self.failed_pages = []   # 재시도 다 해도 못 받은 문서
+        self.expanded = 0        # 링크 받아서 확장한 문서 수
+        self.bytes_downloaded = 0
+        self.decode_seconds = 0.0
+        self.latency_buckets = [0] * (len(FETCH_BUCKETS) + 1)   # 마지막 칸 = 5초 넘음
+        self.latency_sum = 0.0
+        self.depths = []         # 단계별 {"depth", "direction", "frontier", "links", "seconds"}
+        self.phases = {}         # graph_build / layout / draw 걸린 시간
+        self.cancelled = None    # 중간에 끊겼으면 이유
+        self._depth_started = None
+        self._lock = threading.Lock()
+
+    def add(self, requests=0, retries=0, throttled=0.0, failed_pages=(), expanded=0):
+        with self._lock:
+            self.requests += requests
+            self.expanded += expanded
+            self.retries += retries
+            self.throttled += throttled
+            self.failed_pages.extend(failed_pages)
+
+    def observe_fetch(self, seconds, nbytes, decode_seconds):
+        with self._lock:
+            self.latency_buckets[bisect.bisect_left(FETCH_BUCKETS, seconds)] += 1
+            self.latency_sum += seconds
+            self.bytes_downloaded += nbytes
+            self.decode_seconds += decode_seconds
+
+    # 샤드 워커(다른 프로세스)에서 센 값 주고받기
+    def counts(self):
+        return {"requests": self.requests, "retries": self.retries, "throttled": self.throttled, "failed_pages": list(self.failed_pages),
+                "bytes_downloaded": self.bytes_downloaded, "decode_seconds": self.decode_seconds, "latency_buckets": list(self.latency_buckets), "latency_sum": self.latency_sum}
+
+    def merge(self, counts):
+        with self._lock:
+            self.requests += counts["requests"]
+            self.retries += counts["retries"]
+            self.throttled += counts["throttled"]
+            self.failed_pages.extend(counts["failed_pages"])
+            self.bytes_downloaded += counts["bytes_downloaded"]
+            self.decode_seconds += counts["decode_seconds"]
+            self.latency_buckets = [a + b for a, b in zip(self.latency_buckets, counts["latency_buckets"])]
+            self.latency_sum += counts["latency_sum"]
+
+    def begin_depth(self, depth, direction, frontier):
+        self.finish_depth()
+        self.depths.append({"depth": depth, "direction": direction, "frontier": frontier, "links": 0, "seconds": 0.0})
+        self._depth_started = time.perf_counter()
+        return self.depths[-1]
+
+    def finish_depth(self):
+        if self._depth_started is not None:
+            self.depths[-1]["seconds"] = round(time.perf_counter() - self._depth_started, 4)
+            self._depth_started = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try: yield
+        finally: self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def as_dict(self):
+        return {"requests": self.requests, "retries": self.retries, "throttled": round(self.throttled, 3), "expanded": self.expanded, "failed_pages": list(self.failed_pages), "cancelled": self.cancelled}
+
+    def summary(self):
+        text = f" [요청] {self.requests}회, 재시도 {self.retries}회, 대기 {self.throttled:.1f}초"
+        if self.failed_pages: text += f", 실패 문서 {len(self.failed_pages)}개 (결과가 불완전할 수 있음)"
+        if self.cancelled: text += f", 중단됨 ({self.cancelled})"
+        return text
+
+    def metrics_dict(self):
+        metrics = self.as_dict()
+        metrics.update({"bytes_downloaded": self.bytes_downloaded, "decode_seconds": round(self.decode_seconds, 4),
+                        "fetch_latency": {"buckets": dict(zip([str(b) for b in FETCH_BUCKETS] + ["+Inf"], self.latency_buckets)), "sum": round(self.latency_sum, 4)},
+                        "depths": list(self.depths), "phases": {name: round(sec, 4) for name, sec in self.phases.items()}})
+        return metrics
+
+    # 사람이 보는 용 (GUI 로그)
+    def report(self):
+        lines = [" [측정] 단계 | 방향 | 프론티어 | 링크 | 시간"]
+        for level in self.depths:
+            lines.append(f"   {level['depth']:>3} | {level['direction']:>9} | {level['frontier']:>7} | {level['links']:>7} | {level['seconds']:.2f}초")
+        count = sum(self.latency_buckets)
+        if count: lines.append(f"   응답 {count}회 평균 {self.latency_sum / count * 1000:.0f}ms, {self.bytes_downloaded / 1024:.0f}KB, JSON 파싱 {self.decode_seconds:.2f}초")
+        for name, seconds in self.phases.items(): lines.append(f"   {name}: {seconds:.2f}초")
+        if self.cancelled: lines.append(f"   중단됨: {self.cancelled}")
+        return "\n".join(lines)
+
+def _prom_labels(labels):
+    if not labels: return ""
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+# Prometheus 텍스트 형식. runs = [(라벨 dict, RunStats), ...]
+def metrics_to_prometheus(runs):
+    families = {}
+    def sample(name, kind, help_text, labels, value, suffix=""):
+        families.setdefault(name, (kind, help_text, []))[2].append(f"{name}{suffix}{_prom_labels(labels)} {value}")
+    for labels, stats in runs:
+        sample("wiki_search_requests_total", "counter", "API requests issued", labels, stats.requests)
+        sample("wiki_search_retries_total", "counter", "API requests retried", labels, stats.retries)
+        sample("wiki_search_throttled_seconds_total", "counter", "Seconds spent waiting on rate limit and backoff", labels, round(stats.throttled, 4))
+        sample("wiki_search_failed_pages_total", "counter", "Pages whose links could not be fetched", labels, len(stats.failed_pages))
+        sample("wiki_search_expanded_pages_total", "counter", "Pages expanded", labels, stats.expanded)
+        sample("wiki_search_cancelled", "gauge", "1 if the search was cancelled or ran out of budget", labels, int(stats.cancelled is not None))
+        sample("wiki_search_bytes_downloaded_total", "counter", "Response body bytes downloaded", labels, stats.bytes_downloaded)
+        sample("wiki_search_json_decode_seconds_total", "counter", "Seconds spent decoding JSON responses", labels, round(stats.decode_seconds, 4))
+        cumulative = 0
+        for bound, count in zip([str(b) for b in FETCH_BUCKETS] + ["+Inf"], stats.latency_buckets):
+            cumulative += count
+            sample("wiki_search_fetch_latency_seconds", "histogram", "API response latency", dict(labels, le=bound), cumulative, "_bucket")
+        sample("wiki_search_fetch_latency_seconds", "histogram", "API response latency", labels, round(stats.latency_sum, 4), "_sum")
+        sample("wiki_search_fetch_latency_seconds", "histogram", "API response latency", labels, cumulative, "_count")
+        for level in stats.depths:
+            level_labels = dict(labels, depth=level["depth"], direction=level["direction"])
+            sample("wiki_search_frontier_size", "gauge", "Pages in the frontier expanded at this depth", level_labels, level["frontier"])
+            sample("wiki_search_depth_seconds", "gauge", "Seconds spent expanding this depth", level_labels, level["seconds"])
+        for name, seconds in stats.phases.items():
+            sample("wiki_search_phase_seconds", "gauge", "Seconds spent in a non-fetch phase", dict(labels, phase=name), round(seconds, 4))
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"] + samples
+    return "\n".join(lines) + "\n"
+
+# .prom / .txt 면 Prometheus 텍스트, 아니면 JSON
+def export_metrics(path, runs):
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith((".prom", ".txt")): f.write(metrics_to_prometheus(runs))
+        else: json.dump([dict(labels, **stats.metrics_dict()) for labels, stats in runs], f, ensure_ascii=False, indent=1)
+
+# keep-alive 연결 재사용 - 스레드마다 연결 하나씩 들고 있음 (스레드풀 스레드는 계속 살아있으니 = 연결 풀)
+_local = threading.local()
+
+def _http_get_json(params, stats):
+    url = urllib.parse.urlsplit(API)
+    conns = _local.__dict__.setdefault("conns", {})
+    path = url.path + "?" + urllib.parse.urlencode(params)
     while True:
+        conn = conns.get(url.netloc); reused = conn is not None
+        response = None
+        if conn is None:
+            conn_cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+            conn = conns[url.netloc] = conn_cls(url.netloc, timeout=5)
         try:
-            query_string = urllib.parse.urlencode(WIKI_params); full_url = API + "?" + query_string
-            headers = {'User-Agent': 'WikiGameBot/2.0'}
-            req = urllib.request.Request(full_url, headers=headers)
-            with urllib.request.urlopen(req, timeout=5) as response: data = json.loads(response.read().decode("utf-8"))
-            page_id = next(iter(data['query']['pages']))
-            if page_id == "-1" or 'links' not in data['query']['pages'][page_id]: break
-            page_links = data['query']['pages'][page_id]['links']
-            for link in page_links: links.add(link['title'])
-            if 'continue' in data: WIKI_params['plcontinue'] = data['continue']['plcontinue']
-            else: break
-        except Exception: break 
-    return list(links)
+            started = time.perf_counter()
+            conn.request("GET", path, headers=API_HEADERS)
+            response = conn.getresponse()
+            inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if response.getheader("Content-Encoding") == "gzip" else None
+            parts = []; nbytes = 0
+            while True:
+                chunk = response.read(READ_CHUNK)
+                if not chunk: break
+                nbytes += len(chunk)
+                parts.append(inflate.decompress(chunk) if inflate else chunk)
+            if inflate: parts.append(inflate.flush())
+            body = b"".join(parts)
+            latency = time.perf_counter() - started
+            break
+        except zlib.error as e:
+            conn.close(); del conns[url.netloc]
+            raise FetchError(f"압축 해제 실패: {e}", retryable=True)
+        except (http.client.HTTPException, OSError) as e:
+            conn.close(); del conns[url.netloc]
+            # 바로 새로 연결하는 건 재사용하던 연결이 응답 전에 끊긴 경우만 (서버가 keep-alive 를 닫아둠)
+            # 타임아웃 등은 api_request 재시도로 넘김 (속도 제한, 요청 수 제한, 재시도 횟수 다 거침)
+            if not reused or response is not None or isinstance(e, TimeoutError): raise FetchError(f"연결 오류: {e!r}", retryable=True)
+    retry_after = response.getheader("Retry-After")
+    retry_after = float(retry_after) if retry_after and retry_after.isdigit() else None
+    if response.status == 429 or response.status >= 500:
+        raise FetchError(f"HTTP {response.status}", retryable=True, retry_after=retry_after)
+    if response.status != 200: raise FetchError(f"HTTP {response.status}")
+    started = time.perf_counter()
+    try: data = json.loads(body.decode("utf-8"))
+    except ValueError as e: raise FetchError(f"응답 파싱 실패: {e}", retryable=True)
+    stats.observe_fetch(latency, nbytes, time.perf_counter() - started)   # 받은 바이트 = 압축된 크기
+    if 'error' in data:
+        code = data['error'].get('code')
+        raise FetchError(f"API 오류: {code}", retryable=(code == "maxlag"), retry_after=retry_after)
+    return data
 
-def get_links_to_page(page_title):
-    links = set()
-    WIKI_params = {"action": "query", "titles": page_title, "prop": "linkshere", "lhnamespace": 0, "lhlimit": "max", "format": "json", "redirects": 1}
+# 속도 제한 걸고, 429/5xx/타임아웃/maxlag 이면 지수 백오프(+지터)로 재시도
+def api_request(params, stats, cancel=None):
+    cancel = cancel or CancelToken()
+    params = dict(params, maxlag=MAXLAG)
+    for attempt in range(MAX_RETRIES + 1):
+        cancel.charge()
+        stats.add(requests=1, throttled=RATE_LIMITER.acquire(cancel))
+        try:
+            return _http_get_json(params, stats)
+        except FetchError as e:
+            if not e.retryable or attempt == MAX_RETRIES: raise
+            wait = e.retry_after or min(BACKOFF_MAX, DELAY * 2 ** attempt) * random.uniform(0.5, 1.5)
+            stats.add(retries=1, throttled=wait)
+            cancel.sleep(wait)
+
+def _link_params(titles, direction, redirects=True):
+    pre = PREFIX[direction]
+    WIKI_params = {"action": "query", "titles": "|".join(titles), "prop": direction, pre + "namespace": 0, pre + "limit": "max", **API_FORMAT}
+    if redirects: WIKI_params["redirects"] = 1
+    if direction == "linkshere": WIKI_params["lhprop"] = "title|redirect"   # 넘겨주기 문서인지 표시
+    return WIKI_params
+
+# 반환: 다 받았는지. found = API 제목 -> 링크, alias = 요청한 제목 -> API 제목 (정규화, 넘겨주기)
+# redirect_of = linkshere 에 나온 넘겨주기 문서 -> 그게 가리키는 문서 (링크로는 안 넣음)
+def _query_links(WIKI_params, direction, found, alias, redirect_of, stats, cancel):
     while True:
         try:
-            query_string = urllib.parse.urlencode(WIKI_params); full_url = API + "?" + query_string
-            headers = {'User-Agent': 'WikiGameBot/2.0'}
-            req = urllib.request.Request(full_url, headers=headers)
-            with urllib.request.urlopen(req, timeout=5) as response: data = json.loads(response.read().decode("utf-8"))
-            page_id = next(iter(data['query']['pages']))
-            if page_id == "-1" or 'linkshere' not in data['query']['pages'][page_id]: break
-            page_links = data['query']['pages'][page_id]['linkshere']
-            for link in page_links: links.add(link['title'])
-            if 'continue' in data: WIKI_params['lhcontinue'] = data['continue']['lhcontinue']
-            else: break
-        except Exception: break
-    return list(links)
+            data = api_request(WIKI_params, stats, cancel)
+        except FetchError:
+            return False
+        query = data.get('query', {})
+        for item in query.get('normalized', []) + query.get('redirects', []): alias[item['from']] = item['to']
+        for page in query.get('pages', []):
+            links = found.setdefault(page['title'], set())
+            for link in page.get(direction, []):
+                if RESOLVE_REDIRECTS and link.get('redirect'): redirect_of[link['title']] = page['title']
+                else: links.add(link['title'])
+        # 여러 문서 묶음이면 continue 가 여러 번 옴 -> 받은 continue 값 전부 그대로 다시 보내야 함
+        if 'continue' in data: WIKI_params.update(data['continue'])
+        else: return True
 
-# 1 양방향 탐색 -  기본
+def _fetch_chunk(titles, direction, stats, cancel=None):
+    found, alias, redirect_of = {}, {}, {}
+    ok = _query_links(_link_params(titles, direction), direction, found, alias, redirect_of, stats, cancel)
+    # 넘겨주기는 한 단계가 아님 -> 넘겨주기 문서 자체는 빼고, 거기에 건 링크를 원래 문서에 건 링크로 같이 받음
+    # (넘겨주기 안 따라가고 별칭 자체의 linkshere. 이중 넘겨주기는 위키에서도 안 따라가서 한 번만)
+    aliases = list(redirect_of)
+    for i in range(0, len(aliases), BATCH):
+        if not ok: break
+        via = {}
+        ok = _query_links(_link_params(aliases[i:i + BATCH], direction, redirects=False), direction, via, {}, {}, stats, cancel)
+        for page, links in via.items():
+            if page in redirect_of: found[redirect_of[page]] |= links
+    if not ok: stats.add(failed_pages=titles)
+    canonical = {title: _follow_alias(alias, title) for title in titles}
+    if ok and RESOLVE_REDIRECTS: LINK_CACHE.put_canonical(canonical)   # 링크 받으면서 같이 알게 된 거라 공짜
+    return {title: list(found.get(canonical[title], ())) for title in titles}, ok
+
+def _follow_alias(alias, title):
+    seen = {title}
+    while title in alias and alias[title] not in seen:   # 넘겨주기 고리 방지
+        title = alias[title]; seen.add(title)
+    return title
+
+# 넘겨주기 / 표기 정규화 일괄 확인 (prop 없이 titles 만 - 응답이 작음)
+# 탐색에서 프론티어를 확장하기 전에 같은 문서를 가리키는 제목들을 원래 문서 하나로 합치는 데 씀
+RESOLVE_REDIRECTS = True
+
+def _resolve_chunk(titles, stats, cancel=None):
+    try:
+        data = api_request({"action": "query", "titles": "|".join(titles), "redirects": 1, **API_FORMAT}, stats, cancel)
+    except FetchError:
+        return {title: title for title in titles}, False   # 모르면 그냥 원래 제목 (저장 안 함)
+    query = data.get('query', {})
+    alias = {item['from']: item['to'] for item in query.get('normalized', []) + query.get('redirects', [])}
+    return {title: _follow_alias(alias, title) for title in titles}, True
+
+async def resolve_titles(titles, stats, cancel=None):
+    loop = asyncio.get_running_loop()
+    cancel = cancel or CancelToken()
+    result = LINK_CACHE.get_canonical(titles)
+    missing = [title for title in dict.fromkeys(titles) if title not in result]
+    tasks = [loop.run_in_executor(get_io_pool(), _resolve_chunk, missing[i:i + BATCH], stats, cancel) for i in range(0, len(missing), BATCH)]
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=CANCEL_POLL)
+            cancel.check()
+            for task in done:
+                part, ok = task.result()
+                if ok: LINK_CACHE.put_canonical(part)
+                result.update(part)
+    finally:
+        for task in tasks: task.cancel()
+    return result
+
+# 요청 보내는 스레드풀은 하나만 만들어서 전부 같이 씀 -> 이게 전체 동시 요청 제한
+MAX_INFLIGHT = 200
+_io_pool = None
+_io_pool_lock = threading.Lock()
+
+def get_io_pool():
+    global _io_pool
+    with _io_pool_lock:
+        if _io_pool is None:
+            _io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_INFLIGHT, thread_name_prefix="wiki-io")
+    return _io_pool
+
+def _split_cached(titles, direction):
+    cached, missing = {}, []
+    for title in dict.fromkeys(titles):
+        links = LINK_CACHE.get(title, direction)
+        if links is None: missing.append(title)
+        else: cached[title] = links
+    return cached, [missing[i:i + BATCH] for i in range(0, len(missing), BATCH)]
+
+def _store_chunk(part, ok, direction):
+    if ok:   # 중간에 끊긴 건 저장 안함
+        LINK_CACHE.put_many(direction, part)   # 묶음마다 커밋 한 번
+
+# 프론티어 전체를 받아서 제목 -> 링크 목록으로 돌려줌 (동기 버전)
+def get_links_batch(titles, direction, stats=None, cancel=None):
+    stats = stats or RunStats()
+    result, chunks = _split_cached(titles, direction)
+    for part, ok in get_io_pool().map(lambda chunk: _fetch_chunk(chunk, direction, stats, cancel), chunks):
+        _store_chunk(part, ok, direction)
+        result.update(part)
+    return result
+
+def get_links_from_page(page_title):
+    return get_links_batch([page_title], "links")[page_title]
+
+def get_links_to_page(page_title):
+    return get_links_batch([page_title], "linkshere")[page_title]
 
-def find_shortest_path(start, end, log_func):
+# 비동기 버전 - 끝나는 순서대로 (제목, 링크) 를 바로바로 넘겨줌
+# 중간에 그만 받으면 (교차점 찾았을 때) 아직 시작 안 한 요청은 취소
+# cancel 이 취소되면 CANCEL_POLL 안에 SearchCancelled - 이미 보낸 요청은 안 기다리고 버림
+async def expand_frontier(titles, direction, stats, cancel=None):
+    loop = asyncio.get_running_loop()
+    cancel = cancel or CancelToken()
+    cached, chunks = _split_cached(titles, direction)
+    stats.add(expanded=len(cached))
+    for item in cached.items(): yield item
+    tasks = [loop.run_in_executor(get_io_pool(), _fetch_chunk, chunk, direction, stats, cancel) for chunk in chunks]
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=CANCEL_POLL, return_when=asyncio.FIRST_COMPLETED)
+            cancel.check()
+            for task in done:
+                part, ok = task.result()
+                _store_chunk(part, ok, direction)
+                stats.add(expanded=len(part))
+                for item in part.items(): yield item
+    finally:
+        for task in tasks: task.cancel()
+
+# 프로세스 샤드 모드 - 프론티어가 커지면 JSON 파싱이 GIL 하나에 몰려서 느려짐
+# 제목 해시(crc32)로 프론티어를 나눠서 워커 프로세스마다 받고/파싱하고, 결과는 번호 배열로만 돌려줌
+SHARD_WORKERS = 0            # 0 이면 안 씀 (use_shard_workers / --workers)
+SHARD_SPLIT = 4              # 워커당 샤드 수 - 먼저 끝난 샤드부터 처리하고, 교차점 찾으면 남은 건 취소
+SHARD_MIN_FRONTIER = 2000    # 이것보다 작은 프론티어는 그냥 스레드로 (프로세스 왕복이 더 큼)
+_shard_pool = None
+
+# 전체 속도 제한은 그대로 - 샤드 확장하는 동안만 부모 + 워커들이 나눠 씀 (작은 프론티어는 부모가 다 씀)
+def use_shard_workers(workers):
+    global SHARD_WORKERS
+    SHARD_WORKERS = workers
+
+def get_shard_pool():
+    global _shard_pool
+    with _io_pool_lock:
+        if _shard_pool is None:
+            import multiprocessing
+            # fork 는 요청 스레드가 돌고 있는 프로세스를 복사하니까 spawn
+            _shard_pool = concurrent.futures.ProcessPoolExecutor(SHARD_WORKERS, mp_context=multiprocessing.get_context("spawn"), initializer=_init_shard_worker,
+                                                                 initargs=(API, LINK_CACHE.path, SHARD_WORKERS, RATE_LIMITER.rate / (SHARD_WORKERS + 1), RATE_LIMITER.burst / (SHARD_WORKERS + 1)))
+    return _shard_pool
+
+def _init_shard_worker(api, cache_path, workers, rate, burst):
+    global API, LINK_CACHE, RATE_LIMITER, MAX_INFLIGHT
+    API = api
+    LINK_CACHE = LinkCache(cache_path)    # 파일이면 다 같이 씀 (WAL), ":memory:" 면 워커마다 따로
+    RATE_LIMITER = RateLimiter(rate, burst)
+    MAX_INFLIGHT = max(8, MAX_INFLIGHT // workers)
+
+# 워커에서 실행. 샤드 안에서만 쓰는 제목 표 + 번호 배열로 돌려줌 (문자열 리스트 통째로 보내는 것보다 훨씬 작음)
+# 문서 k 의 링크 = nbrs[offsets[k]:offsets[k + 1]]
+def _fetch_shard(titles, direction):
+    stats = RunStats()
+    result = get_links_batch(titles, direction, stats)
+    local = {}
+    src, offsets, nbrs = array.array("i"), array.array("i", [0]), array.array("i")
+    for title, links in result.items():
+        src.append(local.setdefault(title, len(local)))
+        nbrs.extend([local.setdefault(link, len(local)) for link in links])
+        offsets.append(len(nbrs))
+    return list(local), src, offsets, nbrs, stats.counts()
+
+async def _expand_sharded(frontier, direction, stats, cancel, titles):
+    loop = asyncio.get_running_loop()
+    shards = [[] for _ in range(SHARD_WORKERS * SHARD_SPLIT)]
+    for i in frontier:
+        title = titles.title(i)
+        shards[zlib.crc32(title.encode("utf-8")) % len(shards)].append(title)
+    with RATE_LIMITER.shared(SHARD_WORKERS + 1):   # 워커가 받는 동안 부모는 한 몫만
+        futures = [loop.run_in_executor(get_shard_pool(), _fetch_shard, shard, direction) for shard in shards if shard]
+        try:
+            pending = set(futures)
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=CANCEL_POLL, return_when=asyncio.FIRST_COMPLETED)
+                cancel.check()
+                for future in done:
+                    local, src, offsets, nbrs, counts = future.result()
+                    stats.merge(counts)
+                    stats.add(expanded=len(src))
+                    cancel.charge(counts["requests"])
+                    ids = [titles.intern(title) for title in local]   # 샤드 안 고유 제목마다 한 번만
+                    for k in range(len(src)):
+                        yield ids[src[k]], [ids[j] for j in nbrs[offsets[k]:offsets[k + 1]]]
+        finally:
+            for future in futures: future.cancel()   # 워커에서 이미 도는 샤드는 끝까지 감 (결과만 버림)
+
+# 탐색용 - (문서 번호, 링크 번호 목록) 을 끝나는 순서대로. 프론티어가 크면 프로세스 샤드로
+# titles = 그 탐색의 제목 표 (번호는 탐색마다 따로)
+async def expand_frontier_ids(frontier, direction, stats, cancel, titles):
+    if SHARD_WORKERS > 1 and len(frontier) >= SHARD_MIN_FRONTIER:
+        async with contextlib.aclosing(_expand_sharded(frontier, direction, stats, cancel, titles)) as results:
+            async for item in results: yield item
+        return
+    intern = titles.intern
+    async with contextlib.aclosing(expand_frontier([titles.title(i) for i in frontier], direction, stats, cancel)) as results:
+        async for title, links in results: yield intern(title), [intern(link) for link in links]
+
+# 문서 제목 -> 정수 번호 (탐색 상태는 전부 번호로만 들고 있음)
+# 탐색마다 하나씩 만들고 탐색 끝나면 같이 버림 (프로세스 전체에 쌓이지 않게)
+class TitleTable:
+    def __init__(self):
+        self.ids = {}
+        self.titles = []
+        self._lock = threading.Lock()
+
+    def intern(self, title):
+        i = self.ids.get(title)
+        if i is None:
+            with self._lock:
+                i = self.ids.get(title)
+                if i is None:   # 목록에 먼저 넣고 번호를 보이게 함 (락 없이 읽는 쪽이 title(i) 에서 안 터지게)
+                    self.titles.append(title)
+                    i = self.ids[title] = len(self.titles) - 1
+        return i
+
+    def title(self, i):
+        return self.titles[i]
+
+    def __len__(self):
+        return len(self.titles)
+
+# 부모 포인터 따라가서 경로 복원 (교차점 찾았을 때만)
+def _join_path(parent_f, parent_b, meet, title_of):
+    path = []; node = meet
+    while node != -1: path.append(node); node = parent_f[node]
+    path.reverse()
+    node = parent_b[meet]
+    while node != -1: path.append(node); node = parent_b[node]
+    return [title_of(i) for i in path]
+
+def _tree_depth(parents, node):
+    depth = 0
+    while parents[node] != -1: node = parents[node]; depth += 1
+    return depth
+
+# 저장된 트리 둘이 이미 겹치면 겹친 문서 중 (시작까지 + 목표까지) 거리가 가장 작은 곳
+# 두 트리 다 단계를 끝까지 채운 상태라서 이게 곧 최단 경로
+def _best_meeting(parent_f, parent_b):
+    small, large = (parent_f, parent_b) if len(parent_f) <= len(parent_b) else (parent_b, parent_f)
+    best = None
+    for v in small:
+        if v in large:
+            d = _tree_depth(parent_f, v) + _tree_depth(parent_b, v)
+            if best is None or d < best[0]: best = (d, v)
+    return best and best[1]
+
+# 쿼리 캐시 - 탐색 끝나도 시작 기준 정방향 트리 / 목표 기준 역방향 트리를 남겨둠
+# 시작이나 목표가 같은 다음 쿼리는 저장된 프론티어부터 이어서 탐색, 완전히 같은 쿼리는 결과를 바로 돌려줌
+# 번호는 탐색마다 달라서 트리는 제목으로 저장 (parents = {제목: 부모 제목 or None})
+# 트리는 메모리 추정치 합이 TREE_CACHE_MB 넘으면 오래 안 쓴 것부터 버림
+TREE_CACHE_MB = 256
+TREE_TTL = 3600            # 위키 링크는 바뀌니까 한 시간 지나면 버림 (결과도 같이)
+QUERY_MEMO_SIZE = 1000
+
+class QueryCache:
+    def __init__(self, max_bytes=TREE_CACHE_MB * 2**20, ttl=TREE_TTL, memo_size=QUERY_MEMO_SIZE):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memo_size = memo_size
+        self.trees = collections.OrderedDict()   # (뿌리 제목, 방향) -> (parents, 프론티어, 단계 수, 저장 시각, 바이트)
+        self.paths = collections.OrderedDict()   # (시작, 목표) -> (경로, 저장 시각)
+        self.nbytes = 0
+        self._lock = threading.Lock()
+
+    # 저장된 걸 그대로 돌려줌 - 고치지 말고 복사해서 쓸 것
+    def get_tree(self, root, direction):
+        key = (root, direction)
+        with self._lock:
+            tree = self.trees.get(key)
+            if tree is None: return None
+            if time.time() - tree[3] > self.ttl: self._drop(key); return None
+            self.trees.move_to_end(key)
+            return tree[:3]
+
+    def put_tree(self, root, direction, parents, frontier, levels):
+        key = (root, direction)
+        nbytes = sys.getsizeof(parents) + sys.getsizeof(frontier) + sum(map(sys.getsizeof, parents))   # 제목 문자열까지 (부모는 같은 문자열 공유)
+        if nbytes > self.max_bytes: return
+        with self._lock:
+            old = self.trees.get(key)
+            if old is not None:
+                if old[2] >= levels and time.time() - old[3] <= self.ttl: return   # 같거나 더 깊게 본 게 이미 있음
+                self._drop(key)
+            self.trees[key] = (parents, frontier, levels, time.time(), nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes: self._drop(next(iter(self.trees)))
+
+    def _drop(self, key):
+        self.nbytes -= self.trees.pop(key)[4]
+
+    def get_path(self, start, end):
+        with self._lock:
+            memo = self.paths.get((start, end))
+            if memo is None or time.time() - memo[1] > self.ttl: return None
+            self.paths.move_to_end((start, end))
+            return list(memo[0])
+
+    def put_path(self, start, end, path):
+        with self._lock:
+            self.paths[(start, end)] = (list(path), time.time())
+            self.paths.move_to_end((start, end))
+            while len(self.paths) > self.memo_size: self.paths.popitem(last=False)
+
+QUERY_CACHE = QueryCache()
+
+# 시각화 할 때만 networkx 그래프 만듦. edges = [a, b, a, b, ...] 번호 배열 (a -> b 링크)
+# expanded = 방향별 링크를 다 받은 문서 번호. 방향 있는 원본은 G.graph 에 남겨둠 (save_search_graph 용)
+# failed = 받다가 실패한 문서 제목 - 링크가 중간에 잘렸을 수 있어서 다 받은 걸로 안 침 (캐시에 잘린 목록 들어가면 안 됨)
+def build_search_graph(edges, roles, title_of, expanded=None, failed=()):
     import networkx as nx
-    G = nx.Graph()
-    G.add_node(start, type='start')
-    G.add_node(end, type='end')
+    failed = set(failed)
+    if failed: expanded = {direction: [i for i in ids if title_of(i) not in failed] for direction, ids in expanded.items()}
+    G = nx.Graph(edges=edges, title_of=title_of, expanded=expanded or {})
+    G.add_nodes_from((title_of(i) for i in set(edges)), type='normal')
+    G.add_edges_from((title_of(edges[k]), title_of(edges[k + 1])) for k in range(0, len(edges), 2))
+    for title, role in roles.items(): G.add_node(title, type=role)
+    return G
+
+# 시작/목표 문서를 넘겨주기 따라간 원래 제목으로
+async def _canonical_endpoints(start, end, log_func, stats, cancel):
+    if not RESOLVE_REDIRECTS: return start, end
+    try: canonical = await resolve_titles([start, end], stats, cancel)
+    except SearchCancelled: return start, end   # 탐색 루프에서 다시 걸려서 중단 보고됨
+    for title in (start, end):
+        if canonical[title] != title: log_func(f" [넘겨주기] '{title}' -> '{canonical[title]}'")
+    return canonical[start], canonical[end]
+
+# 프론티어 전체를 한번에 확인해서 같은 문서를 가리키는 제목(넘겨주기, 표기 차이)을 합침
+# 별칭 u 가 원래 문서 c 를 가리키면 u 대신 c 를 u 의 부모 밑에 넣음 (c 를 이미 방문했으면 그냥 버림)
+# 반환: (합친 프론티어, 상대편이 이미 방문한 문서 = 교차점 or None)
+async def collapse_frontier(frontier, parents, others, forward, edges, stats, cancel, titles):
+    canonical = await resolve_titles([titles.title(u) for u in frontier], stats, cancel)
+    collapsed = []
+    for u in frontier:
+        c = titles.intern(canonical[titles.title(u)])
+        if c == u: collapsed.append(u); continue
+        if c in parents: continue
+        parents[c] = parents[u]
+        if edges is not None and parents[u] != -1:
+            if forward: edges.append(parents[u]); edges.append(c)
+            else: edges.append(c); edges.append(parents[u])
+        if c in others: return collapsed, c
+        collapsed.append(c)
+    return collapsed, None
+
+# 탐색 중간 결과 보내기 - 새로 찾은 문서를 (제목, 부모 제목) 로 묶어서 on_progress 로 (GUI 실시간 그래프용)
+PROGRESS_INTERVAL = 0.25   # 이것보다 자주는 안 보냄 (초)
+
+def _emit_progress(on_progress, depth, direction, pending, parents, titles):
+    on_progress({"depth": depth, "direction": direction, "nodes": [(titles.title(v), titles.title(parents[v])) for v in pending]})
+    pending.clear()
+    return time.monotonic()
+
+# 1 양방향 탐색 -  기본
+MAX_EXPANSIONS = 10     # 한쪽씩 확장한 횟수 = 경로 길이 상한
+DEFAULT_DEGREE = 100    # 링크 수 모를 때 가정하는 값 (확장해본 평균으로 바뀜)
+
+# 프론티어 확장 비용 추정 = 받아올 링크 수. 캐시에 있으면 실제 링크 수, 없으면 지금까지 평균
+def estimate_frontier_cost(frontier, direction, seen, titles):
+    degrees = LINK_CACHE.degrees([titles.title(i) for i in frontier], direction)
+    average = seen[1] / seen[0] if seen[0] else DEFAULT_DEGREE
+    return sum(degrees.values()) + average * (len(frontier) - len(degrees))
+
+def find_shortest_path(start, end, log_func, graph=None, want_graph=False, stats=None, on_progress=None, cancel=None, hubs=None):
+    if graph is not None: return find_shortest_path_offline(graph, start, end, log_func, want_graph=want_graph, stats=stats, cancel=cancel)
+    stats = stats or RunStats()
+    memo = QUERY_CACHE.get_path(start, end)
+    if memo is not None:
+        log_func(f" [결과 캐시] 같은 쿼리 결과 재사용: {' -> '.join(memo)}")
+        if not want_graph: return memo, None
+        titles = TitleTable()
+        with stats.phase("graph_build"): return memo, build_search_graph([titles.intern(title) for pair in zip(memo, memo[1:]) for title in pair], {memo[0]: 'start', memo[-1]: 'end'}, titles.title)
+    cache_before = LINK_CACHE.stats()
+    try:
+        found = asyncio.run(_find_shortest_path(start, end, log_func, want_graph, stats, on_progress, cancel or CancelToken(), hubs))
+    finally:
+        stats.finish_depth()
+        log_cache_stats(log_func, cache_before)
+        log_func(stats.summary())
+    # 최단이 확실한 것만 저장 (중간에 끊겼거나, 못 받은 문서가 있거나, 허브 경로 그냥 쓴 건 빼고)
+    path = found[0]
+    if path and not stats.cancelled and not stats.failed_pages and (hubs is None or HUB_VERIFY):
+        QUERY_CACHE.put_path(start, end, path)
+        QUERY_CACHE.put_path(path[0], path[-1], path)
+    return found
+
+async def _find_shortest_path(start, end, log_func, want_graph, stats, on_progress, cancel, hubs):
+    start, end = await _canonical_endpoints(start, end, log_func, stats, cancel)
+    titles = TitleTable()
+    intern, title = titles.intern, titles.title
+    s = intern(start); t = intern(end)
+    roles = {start: 'start', end: 'end'}
+    edges = array.array("i") if want_graph else None
+    expanded = {"links": array.array("i"), "linkshere": array.array("i")} if want_graph else None
+    def result(path):
+        if not want_graph: return path, None
+        with stats.phase("graph_build"): return path, build_search_graph(edges, roles, title, expanded, stats.failed_pages)
+    def hub_result(path):
+        if edges is not None:
+            for a, b in zip(path, path[1:]): edges.append(intern(a)); edges.append(intern(b))
+        return result(path)
+
+    queue_f = [s]; parent_f = {s: -1}
+    queue_b = [t]; parent_b = {t: -1}
+    if s == t: return result([start])
+    seen = {"links": [0, 0], "linkshere": [0, 0]}    # 방향별 [확장한 문서 수, 받은 링크 수] -> 평균 링크 수 추정
+    # 방향별 마지막으로 끝낸 단계의 상태 (parent 수, 프론티어, 단계 수) - 끝날 때 이걸 쿼리 캐시에 저장
+    # parents 는 넣은 순서 = BFS 순서라서 앞에서 parent 수만큼 자르면 그 단계 끝난 시점 그대로
+    snap = {"links": (1, queue_f, 0), "linkshere": (1, queue_b, 0)}
+    tree_f = QUERY_CACHE.get_tree(start, "links")
+    tree_b = QUERY_CACHE.get_tree(end, "linkshere")
+    def load_tree(tree):   # 제목 트리 -> 이번 탐색 번호
+        parents = {intern(v): -1 if u is None else intern(u) for v, u in tree[0].items()}
+        return parents, [intern(v) for v in tree[1]]
+    if tree_f: parent_f, queue_f = load_tree(tree_f); snap["links"] = (len(parent_f), queue_f, tree_f[2])
+    if tree_b: parent_b, queue_b = load_tree(tree_b); snap["linkshere"] = (len(parent_b), queue_b, tree_b[2])
 
-    queue_f = deque([start]); paths_f = {start: [start]}
-    queue_b = deque([end]); paths_b = {end: [end]}
-    
     log_func(f" [1차] 양방향 병렬 탐색 시작: '{start}' <--> '{end}'")
-    depth = 0
-    with concurrent.futures.ThreadPoolExecutor(THREADS=THREADS) as executor:
+    depth = snap["links"][2] + snap["linkshere"][2]
+    bound = None    # 허브 경로 - 이것보다 짧은 게 있는지만 확인하면 됨
+    if tree_f or tree_b:
+        log_func(f" [트리 캐시] 정방향 {snap['links'][2]}단계 / 역방향 {snap['linkshere'][2]}단계까지 본 트리에서 이어서 탐색")
+        if edges is not None:
+            for parents, forward in ((parent_f, True), (parent_b, False)):
+                for v, u in parents.items():
+                    if u == -1: continue
+                    if forward: edges.append(u); edges.append(v)
+                    else: edges.append(v); edges.append(u)
+        meet = _best_meeting(parent_f, parent_b)
+        if meet is not None:
+            log_func(f" ! 교차점 발견 (저장된 트리) : [{title(meet)}]")
+            roles.setdefault(title(meet), 'intersection')
+            return result(_join_path(parent_f, parent_b, meet, title))
+    try:
+        if hubs is not None:
+            bound = await _hub_route(hubs, start, end, log_func, stats, cancel)
+            if bound and (not HUB_VERIFY or len(bound) <= 2): return hub_result(bound)
         while queue_f and queue_b:
             depth += 1
-            log_func(f"\n--- [ Depth {depth} ] ---")
-            
-            # 정방향
-            current_pages_f = list(queue_f); queue_f.clear()
-            log_func(f"-> [1팀/정방향] {len(current_pages_f)}개 문서 분석...")
-            results_f = list(executor.map(get_links_from_page, current_pages_f))
-            for i, links in enumerate(results_f):
-                current_page = current_pages_f[i]; current_path = paths_f[current_page]
-                for link_page in links:
-                    if link_page not in G: G.add_node(link_page, type='normal')
-                    G.add_edge(current_page, link_page)
-                    if link_page in paths_b:
-                        log_func(f" ! 교차점 발견 : [{link_page}]")
-                        G.nodes[link_page]['type'] = 'intersection'
-                        path_f = current_path + [link_page]; path_b = paths_b[link_page]; path_b.reverse()
-                        return path_f + path_b[1:], G
-                    if link_page not in paths_f: new_path = current_path + [link_page]; paths_f[link_page] = new_path; queue_f.append(link_page)
-
-            # 역방향
-            current_pages_b = list(queue_b); queue_b.clear()
-            log_func(f"<- [2팀/역방향] {len(current_pages_b)}개 문서 분석...")
-            results_b = list(executor.map(get_links_to_page, current_pages_b))
-            for i, links in enumerate(results_b):      # 이거 왜 안됌?
-                current_page = current_pages_b[i]; current_path = paths_b[current_page]
-                for link_page in links:
-                    if link_page not in G: G.add_node(link_page, type='normal')
-                    G.add_edge(current_page, link_page)
-                    if link_page in paths_f:    # 이거 맞지않나
-                        log_func(f" ! 교차점 발견 : [{link_page}]")
-                        G.nodes[link_page]['type'] = 'intersection'
-                        path_f = paths_f[link_page]; path_b = current_path + [link_page]; path_b.reverse()
-                        return path_f + path_b[1:], G
-                    if link_page not in paths_b: new_path = current_path + [link_page]; paths_b[link_page] = new_path; queue_b.append(link_page)
-            
-            if depth > 4: log_func(" 탐색이 너무 깊어져 중단합니다."); return None, G
-    return None, G
+            cancel.check()
+            # 받아야 할 링크 수가 적은 쪽(= 다음 프론티어가 작은 쪽)만 한 단계 확장
+            cost_f = estimate_frontier_cost(queue_f, "links", seen["links"], titles)
+            cost_b = estimate_frontier_cost(queue_b, "linkshere", seen["linkshere"], titles)
+            forward = cost_f <= cost_b
+            log_func(f"\n--- [ Depth {depth} ] --- (예상 링크 수 정방향 {cost_f:.0f} / 역방향 {cost_b:.0f})")
+
+            # 한쪽 단계를 통째로 확장하는 동안 상대편 방문 집합(프론티어 포함)은 그대로라서
+            # 처음 찾은 교차점이 곧 최단 경로 (더 짧은 경로가 있었으면 이전 단계에서 이미 만났음)
+            if forward:
+                current, queue_f = queue_f, []
+                parents, others, queue, direction = parent_f, parent_b, queue_f, "links"
+                log_func(f"-> [1팀/정방향] {len(current)}개 문서 분석...")
+            else:
+                current, queue_b = queue_b, []
+                parents, others, queue, direction = parent_b, parent_f, queue_b, "linkshere"
+                log_func(f"<- [2팀/역방향] {len(current)}개 문서 분석...")
+            level = stats.begin_depth(depth, direction, len(current))
+            pending = [] if on_progress else None; last_emit = time.monotonic()
+            async with contextlib.aclosing(expand_frontier_ids(current, direction, stats, cancel, titles)) as results:
+                async for u, links in results:
+                    seen[direction][0] += 1; seen[direction][1] += len(links); level["links"] += len(links)
+                    for v in links:
+                        if edges is not None:
+                            if forward: edges.append(u); edges.append(v)
+                            else: edges.append(v); edges.append(u)
+                        if v in others:
+                            link_page = title(v)
+                            log_func(f" ! 교차점 발견 : [{link_page}]")
+                            roles.setdefault(link_page, 'intersection')
+                            parents.setdefault(v, u)
+                            return result(_join_path(parent_f, parent_b, v, title))
+                        if v not in parents:
+                            parents[v] = u; queue.append(v)
+                            if pending is not None: pending.append(v)
+                    if expanded is not None: expanded[direction].append(u)
+                    if pending and time.monotonic() - last_emit >= PROGRESS_INTERVAL:
+                        last_emit = _emit_progress(on_progress, depth, direction, pending, parents, titles)
+            if pending: _emit_progress(on_progress, depth, direction, pending, parents, titles)
+            # 새로 찾은 별칭은 이 단계 안에서 원래 문서로 합침 - 다음 확장까지 미루면 그 사이 반대편이 먼저 돌아서
+            # 원래 문서로 만나는 걸 한 단계 늦게 보고 더 긴 경로를 낼 수 있음
+            if RESOLVE_REDIRECTS:
+                collapsed, meet = await collapse_frontier(queue, parents, others, forward, edges, stats, cancel, titles)
+                queue[:] = collapsed
+                if meet is not None:
+                    log_func(f" ! 교차점 발견 (넘겨주기) : [{title(meet)}]")
+                    roles.setdefault(title(meet), 'intersection')
+                    return result(_join_path(parent_f, parent_b, meet, title))
+            snap[direction] = (len(parents), queue, snap[direction][2] + 1)
+
+            # 확장 k 번이면 길이 k 이하 경로는 다 찾았음 -> 허브 경로보다 한 단계 짧은 것까지만 보면 됨
+            if bound and depth >= len(bound) - 2:
+                log_func(f" 허브 경로({len(bound) - 1}단계)보다 짧은 경로가 없어 허브 경로를 씁니다."); return hub_result(bound)
+            if depth >= MAX_EXPANSIONS: log_func(" 탐색이 너무 깊어져 중단합니다."); return result(None)
+        return hub_result(bound) if bound else result(None)
+    except SearchCancelled as e:
+        # 중간 결과 보고 - 여기까지 본 문서 수 (그래프도 여기까지 받은 링크로 만듦). 허브 경로가 있으면 그거라도
+        stats.cancelled = str(e)
+        log_func(f"\n [중단] {e} - Depth {depth} 에서 멈춤 (정방향 {len(parent_f)}개 / 역방향 {len(parent_b)}개 문서 방문, 요청 {stats.requests}회)")
+        return hub_result(bound) if bound else result(None)
+    finally:
+        # 취소돼도 끝낸 단계까지는 맞는 트리라 저장 (못 받은 문서가 있으면 트리가 빠져서 안 함)
+        if not stats.failed_pages:
+            for root, direction, parents in ((start, "links", parent_f), (end, "linkshere", parent_b)):
+                mark, frontier, levels = snap[direction]
+                if levels: QUERY_CACHE.put_tree(root, direction, {title(v): None if u == -1 else title(u) for v, u in itertools.islice(parents.items(), mark)}, [title(v) for v in frontier], levels)
 
 # [2] 정방향 전용 탐색
 # 안되면 한번 더 하기 
 
-def find_shortest_path_forward_only(start, end, log_func):
-    import networkx as nx
-    G = nx.Graph()
-    G.add_node(start, type='start')
-    G.add_node(end, type='end')
+def find_shortest_path_forward_only(start, end, log_func, graph=None, want_graph=False, stats=None, on_progress=None, cancel=None):
+    if graph is not None: return find_shortest_path_offline(graph, start, end, log_func, bidirectional=False, want_graph=want_graph, stats=stats, cancel=cancel)
+    stats = stats or RunStats()
+    cache_before = LINK_CACHE.stats()
+    try:
+        return asyncio.run(_find_shortest_path_forward_only(start, end, log_func, want_graph, stats, on_progress, cancel or CancelToken()))
+    finally:
+        stats.finish_depth()
+        log_cache_stats(log_func, cache_before)
+        log_func(stats.summary())
+
+async def _find_shortest_path_forward_only(start, end, log_func, want_graph, stats, on_progress, cancel):
+    start, end = await _canonical_endpoints(start, end, log_func, stats, cancel)
+    titles = TitleTable()
+    intern, title = titles.intern, titles.title
+    s = intern(start); t = intern(end)
+    roles = {start: 'start', end: 'end'}
+    edges = array.array("i") if want_graph else None
+    expanded = {"links": array.array("i")} if want_graph else None
+    def result(path):
+        if not want_graph: return path, None
+        with stats.phase("graph_build"): return path, build_search_graph(edges, roles, title, expanded, stats.failed_pages)
+
+    queue = [s]
+    parent = {s: -1}
+    if s == t: return result([start])
 
-    queue = deque([start])
-    visited = {start: [start]}
-    
     log_func(f" [2차] 정방향 안전 탐색 시작: '{start}' -> '{end}'")
     depth = 0
-    
-    with concurrent.futures.ThreadPoolExecutor(THREADS=THREADS) as executor:
+
+    try:
         while queue:
             depth += 1
+            cancel.check()
             log_func(f"\n--- [ Depth {depth} (Forward) ] ---")
-            
-            current_pages = list(queue)
-            queue.clear()
-            
+
+            current_pages = queue
+            queue = []
+            if RESOLVE_REDIRECTS:
+                current_pages, meet = await collapse_frontier(current_pages, parent, {t: -1}, True, edges, stats, cancel, titles)
+                if meet is not None:
+                    log_func(f" ! 목표 발견 (넘겨주기) : [{end}]")
+                    return result(_join_path(parent, {t: -1}, t, title))
+
             log_func(f"-> {len(current_pages)}개 문서 분석 중...")
-            results = list(executor.map(get_links_from_page, current_pages))
-            
-            for i, links in enumerate(results):
-                parent = current_pages[i]
-                current_path = visited[parent]
-                
-                for link in links:
-                    if link not in G: G.add_node(link, type='normal')
-                    G.add_edge(parent, link)
-                    
-                    if link == end:
-                        log_func(f" ! 목표 발견 : [{link}]")
-                        return current_path + [link], G
-                    
-                    if link not in visited:
-                        visited[link] = current_path + [link]
-                        queue.append(link)
-            
+            level = stats.begin_depth(depth, "links", len(current_pages))
+            pending = [] if on_progress else None; last_emit = time.monotonic()
+            async with contextlib.aclosing(expand_frontier_ids(current_pages, "links", stats, cancel, titles)) as results:
+                async for u, links in results:
+                    level["links"] += len(links)
+
+                    for v in links:
+                        if edges is not None: edges.append(u); edges.append(v)
+
+                        if v == t:
+                            log_func(f" ! 목표 발견 : [{end}]")
+                            parent.setdefault(v, u)
+                            return result(_join_path(parent, {t: -1}, t, title))
+
+                        if v not in parent:
+                            parent[v] = u
+                            queue.append(v)
+                            if pending is not None: pending.append(v)
+                    if expanded is not None: expanded["links"].append(u)
+
+                    if pending and time.monotonic() - last_emit >= PROGRESS_INTERVAL:
+                        last_emit = _emit_progress(on_progress, depth, "links", pending, parent, titles)
+            if pending: _emit_progress(on_progress, depth, "links", pending, parent, titles)
+
             if depth > 5:
                 log_func(" # 탐색이 너무 깊어져 중단합니다.")
-                return None, G
-    return None, G
+                return result(None)
+        return result(None)
+    except SearchCancelled as e:
+        stats.cancelled = str(e)
+        log_func(f"\n [중단] {e} - Depth {depth} 에서 멈춤 (문서 {len(parent)}개 방문, 요청 {stats.requests}회)")
+        return result(None)
 
-# 셀레니움 시연 함수
-def show_path_selenium(path, log_func):
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.chrome.options import Options
-    from webdriver_manager.chrome import ChromeDriverManager
-    from selenium.common.exceptions import NoSuchElementException, ElementNotInteractableException
+# [3] 한 문서에서 여러 목표까지 거리 (분석용) - 목표마다 따로 탐색하면 시작 문서 주변을 매번 다시 받으니까
+# 시작 문서에서 정방향 BFS 한 번만 돌리면서 목표를 만나는 대로 on_result 로 바로 넘겨줌
+# backward_depth = k 면 먼저 목표 전부에서 동시에 역방향 k 단계 (문서마다 {목표: (목표까지 거리, 다음 문서)})
+# -> 정방향이 그 안에 들어오면 거리 = 정방향 깊이 + k. 단계가 끝날 때 제일 작은 값으로 확정 (목표를 직접 만나면 바로 확정)
+# 목표를 다 찾았거나 max_depth 단계까지 봤으면 끝. 못 찾은 목표는 distance=None 으로 마지막에 넘겨줌
+def find_distances_from(source, targets, log_func, max_depth=MAX_EXPANSIONS, on_result=None, backward_depth=0, stats=None, cancel=None):
+    stats = stats or RunStats()
+    cache_before = LINK_CACHE.stats()
+    try:
+        return asyncio.run(_find_distances_from(source, list(targets), log_func, max_depth, on_result or (lambda record: None), backward_depth, stats, cancel or CancelToken()))
+    finally:
+        stats.finish_depth()
+        log_cache_stats(log_func, cache_before)
+        log_func(stats.summary())
 
-    if not path: return False # 실패 반환
-    
-    log_func("\n [자동 시연] 브라우저를 전체화면으로 실행합니다...")
-    driver = None
-    success = False # 성공 여부 추적
+async def _find_distances_from(source, targets, log_func, max_depth, on_result, backward_depth, stats, cancel):
+    titles = TitleTable()
+    intern, title = titles.intern, titles.title
+    results = {}
+    wanted = {}    # 아직 못 찾은 목표 번호 -> 입력 제목들 (넘겨주기로 같은 문서면 여러 개)
+    back = {}      # 역방향으로 본 문서 -> {목표: (목표까지 거리, 목표 쪽 다음 문서)}
+    parents = {}
+    best = {}      # 이번 단계에서 역방향 범위로 찾은 목표 -> (거리, 만난 문서)
+
+    def path_to(v, t):
+        path = []; node = v
+        while node != -1: path.append(node); node = parents[node]
+        path.reverse(); node = v
+        while node != t: node = back[node][t][1]; path.append(node)
+        return [title(i) for i in path]
+
+    def emit(t, distance, v):
+        path = path_to(v, t) if distance is not None else None
+        for target in wanted.pop(t):
+            record = {"source": source, "target": target, "distance": distance, "path": path}
+            results[target] = record
+            on_result(record)
 
+    # 정방향이 v 를 거리 d 에서 처음 만남
+    def reach(v, d):
+        for t, (k, _) in back.get(v, {}).items():
+            if t not in wanted: continue
+            if k == 0: emit(t, d, v)
+            elif t not in best or d + k < best[t][0]: best[t] = (d + k, v)
+
+    def settle():
+        for t, (distance, v) in sorted(best.items(), key=lambda item: item[1][0]):
+            if t in wanted: emit(t, distance, v)
+        best.clear()
+
+    depth = 0
     try:
-        import os
+        for target in targets: wanted.setdefault(intern(target), []).append(target)   # 넘겨주기 확인하다 멈춰도 목표마다 null 한 줄씩 나가게
+        canonical = await resolve_titles([source, *targets], stats, cancel) if RESOLVE_REDIRECTS else {}
+        wanted.clear()
+        for target in targets: wanted.setdefault(intern(canonical.get(target, target)), []).append(target)
+        s = intern(canonical.get(source, source))
+        log_func(f" [거리] '{title(s)}' 에서 목표 {len(targets)}개 (서로 다른 문서 {len(wanted)}개)")
+
+        # 1) 목표 전부에서 동시에 역방향 - 문서마다 한 번만 받고 그 문서에 걸린 목표를 같이 넘김
+        # 역링크는 양방향 탐색이랑 같이 API linkshere 기준 (넘겨주기 문서는 받을 때 이미 빠짐, 그걸 거쳐서 건 링크도 안 나옴)
+        frontier = {t: {t} for t in wanted}
+        for t in wanted: back[t] = {t: (0, -1)}
+        for k in range(1, backward_depth + 1):
+            cancel.check()
+            level = stats.begin_depth(k, "linkshere", len(frontier))
+            nxt = {}
+            async with contextlib.aclosing(expand_frontier_ids(list(frontier), "linkshere", stats, cancel, titles)) as results_b:
+                async for u, links in results_b:
+                    level["links"] += len(links)
+                    for w in links:
+                        labels = back.setdefault(w, {})
+                        for t in frontier[u]:
+                            if t not in labels: labels[t] = (k, u); nxt.setdefault(w, set()).add(t)
+            log_func(f" [거리] 역방향 {k}단계: 문서 {len(back)}개")
+            frontier = nxt
+            if not frontier: break
+
+        # 2) 시작 문서에서 정방향
+        parents[s] = -1; queue = [s]
+        reach(s, 0); settle()
+        while queue and wanted and depth < max_depth:
+            depth += 1
+            cancel.check()
+            level = stats.begin_depth(depth, "links", len(queue))
+            nxt = []
+            async with contextlib.aclosing(expand_frontier_ids(queue, "links", stats, cancel, titles)) as results_f:
+                async for u, links in results_f:
+                    level["links"] += len(links)
+                    for v in links:
+                        if v not in parents:
+                            parents[v] = u; nxt.append(v)
+                            reach(v, depth)
+                    if not wanted: break
+            if RESOLVE_REDIRECTS and wanted:   # 확정하기 전에 별칭 합침 - 합친 원래 문서는 별칭이랑 같은 거리
+                before = set(nxt)
+                nxt, _ = await collapse_frontier(nxt, parents, {}, True, None, stats, cancel, titles)
+                for c in nxt:
+                    if c not in before: reach(c, depth)
+            settle()
+            queue = nxt
+            log_func(f" [거리] Depth {depth}: 문서 {len(parents)}개, 남은 목표 {len(wanted)}개")
+    except SearchCancelled as e:
+        stats.cancelled = str(e)
+        log_func(f"\n [중단] {e} - Depth {depth} 에서 멈춤 (남은 목표 {len(wanted)}개)")
+    for t in list(wanted): emit(t, None, None)
+    return results
+
+# ==============
+# 허브(랜드마크) 색인 - 링크 많은 문서 몇 개의 앞/뒤 2단계 이웃을 미리 받아서 저장
+# 시작 -> 허브 -> 목표 로 이어지면 그 경로 길이를 상한으로 두고 BFS 를 한 단계 일찍 끝냄
+# ==============
+
+HUB_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wiki_hubs.sqlite3")
+HUBS = ["대한민국", "미국", "일본", "중국", "영국", "프랑스", "독일", "러시아", "서울특별시", "영어"]
+HUB_DEPTH = 2
+HUB_EXPAND_LIMIT = 5000        # 한 단계에서 확장할 최대 문서 수 (대한민국 역링크만 수십만개)
+HUB_MAX_AGE = 7 * 24 * 3600    # 이것보다 오래된 허브만 다시 받음
+HUB_VERIFY = True              # False 면 허브 경로를 바로 돌려줌 (요청 몇 번으로 끝나지만 최단 보장 안 됨)
+
+class HubIndex:
+    def __init__(self, path=HUB_DB):
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS hubs (hub TEXT, direction TEXT, depth INTEGER, nodes INTEGER, built REAL, PRIMARY KEY (hub, direction))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS hub_nodes (hub TEXT, direction TEXT, title TEXT, depth INTEGER, parent TEXT, PRIMARY KEY (hub, direction, title))")
+        self.db.execute("CREATE INDEX IF NOT EXISTS hub_nodes_title ON hub_nodes (direction, title)")
+        self.db.commit()
+
+    def hubs(self):
+        with self._lock: return sorted({hub for hub, in self.db.execute("SELECT hub FROM hubs")})
+
+    # 허브 하나 한 방향을 통째로 다시 받아서 저장
+    def build(self, hub, direction, depth=HUB_DEPTH, log_func=print, stats=None):
+        stats = stats or RunStats()
+        nodes = asyncio.run(_hub_neighborhood(hub, direction, depth, log_func, stats))
+        with self._lock:
+            self.db.execute("DELETE FROM hub_nodes WHERE hub=? AND direction=?", (hub, direction))
+            self.db.executemany("INSERT INTO hub_nodes VALUES (?, ?, ?, ?, ?)", ((hub, direction, title, d, parent) for title, (d, parent) in nodes.items()))
+            self.db.execute("INSERT OR REPLACE INTO hubs VALUES (?, ?, ?, ?, ?)", (hub, direction, depth, len(nodes), time.time()))
+            self.db.commit()
+        return len(nodes)
+
+    # 증분 갱신 - 없거나 오래된 허브만 다시 받고, 목록에서 빠진 허브는 지움
+    def refresh(self, hubs=HUBS, max_age=HUB_MAX_AGE, depth=HUB_DEPTH, log_func=print):
+        stats = RunStats()
+        with self._lock:
+            built = {(hub, direction): (d, t) for hub, direction, d, t in self.db.execute("SELECT hub, direction, depth, built FROM hubs")}
+            for hub in {hub for hub, _ in built} - set(hubs):
+                self.db.execute("DELETE FROM hub_nodes WHERE hub=?", (hub,))
+                self.db.execute("DELETE FROM hubs WHERE hub=?", (hub,))
+            self.db.commit()
+        for hub in hubs:
+            for direction in ("links", "linkshere"):
+                d, t = built.get((hub, direction), (None, 0))
+                if d == depth and time.time() - t < max_age: continue
+                count = self.build(hub, direction, depth, log_func, stats)
+                log_func(f" [허브] '{hub}' {direction} {depth}단계까지 {count}개 저장")
+        log_func(stats.summary())
+        return stats
+
+    # titles = {제목: 앞에 붙은 길이} 중 색인에 있는 것 -> 허브마다 가장 가까운 (길이, 제목)
+    def _nearest(self, direction, titles):
+        keys = list(titles)
+        best = {}
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            for hub, title, d in self.db.execute(f"SELECT hub, title, depth FROM hub_nodes WHERE direction=? AND title IN ({','.join('?' * len(part))})", (direction, *part)):
+                d += titles[title]
+                if hub not in best or d < best[hub][0]: best[hub] = (d, title)
+        return best
+
+    # title -> 부모 -> ... -> 허브
+    def _chain(self, hub, direction, title):
+        chain = [title]
+        while True:
+            row = self.db.execute("SELECT parent FROM hub_nodes WHERE hub=? AND direction=? AND title=?", (hub, direction, chain[-1])).fetchone()
+            if row is None or row[0] is None: return chain
+            chain.append(row[0])
+
+    # 시작(또는 시작에서 한 칸 간 문서) -> 허브 -> 목표(또는 목표로 한 칸 오는 문서) 중 가장 짧은 경로
+    def route(self, start, end, start_links=(), end_links=()):
+        heads = dict.fromkeys(start_links, 1); heads[start] = 0
+        tails = dict.fromkeys(end_links, 1); tails[end] = 0
+        with self._lock:
+            up = self._nearest("linkshere", heads)     # 허브로 가는 쪽 = 허브의 역방향 이웃
+            down = self._nearest("links", tails)
+            best = min(((up[hub][0] + down[hub][0], hub) for hub in up.keys() & down.keys()), default=None)
+            if best is None: return None
+            hub = best[1]
+            head = self._chain(hub, "linkshere", up[hub][1])
+            tail = self._chain(hub, "links", down[hub][1])[::-1]
+        path = ([start] if heads[up[hub][1]] else []) + head + tail[1:] + ([end] if tails[down[hub][1]] else [])
+        simple = []    # 앞뒤에 같은 문서가 겹치면 그 사이는 잘라냄
+        for title in path:
+            if title in simple: del simple[simple.index(title) + 1:]
+            else: simple.append(title)
+        return simple
+
+async def _hub_neighborhood(hub, direction, depth, log_func, stats):
+    root = (await resolve_titles([hub], stats))[hub] if RESOLVE_REDIRECTS else hub
+    nodes = {root: (0, None)}   # 제목 -> (단계, 부모)
+    frontier = [root]
+    for level in range(1, depth + 1):
+        if len(frontier) > HUB_EXPAND_LIMIT:
+            log_func(f" [허브] '{hub}' {level}단계: {len(frontier)}개 중 {HUB_EXPAND_LIMIT}개만 확장")
+            frontier = frontier[:HUB_EXPAND_LIMIT]
+        nxt = []
+        async with contextlib.aclosing(expand_frontier(frontier, direction, stats)) as results:
+            async for title, links in results:
+                for link in links:
+                    if link not in nodes: nodes[link] = (level, title); nxt.append(link)
+        frontier = nxt
+    return nodes
+
+# 허브 경로 찾기. 바로 안 이어지면 시작의 링크 / 목표의 역링크로 한 칸 넓혀서 다시 (BFS 첫 단계랑 같은 요청이라 캐시에 남음)
+async def _hub_route(hubs, start, end, log_func, stats, cancel):
+    route = hubs.route(start, end)
+    if route is None:
+        neighbors = {}
+        for title, direction in ((start, "links"), (end, "linkshere")):
+            async with contextlib.aclosing(expand_frontier([title], direction, stats, cancel)) as results:
+                async for _, links in results: neighbors[direction] = links
+        route = hubs.route(start, end, neighbors.get("links", ()), neighbors.get("linkshere", ()))
+    if route: log_func(f" [허브] {len(route) - 1}단계 경로: {' -> '.join(route)}")
+    return route
+
+# ==============
+# 오프라인 모드 - 위키 덤프(page + pagelinks)를 CSR 파일로 한번 변환해두고 mmap 으로 탐색
+# ==============
+
+OFFLINE_MAGIC = b"WIKICSR1"
+OFFLINE_HEADER = struct.Struct("<8sQQQ")   # magic, 문서 수, 링크 수, 제목 바이트 수
+OFFLINE_MAX_DEPTH = 10
+
+_SQL_TOKEN = re.compile(r"'((?:[^'\\]|\\.)*)'|([^,()']+)|([(),])")
+_SQL_ESCAPE = re.compile(r"\\(.)")
+_SQL_UNESCAPE = {"n": "\n", "r": "\r", "t": "\t", "0": "\0", "Z": "\x1a"}
+
+def _open_dump(path):
+    if path.endswith(".gz"): return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+# 덤프 한 줄씩 -> 행(문자열 리스트). .sql(.gz) 는 INSERT 문 파싱, .tsv(.gz) 는 탭으로 자르기
+def _dump_rows(path):
+    with _open_dump(path) as f:
+        if path.endswith((".tsv", ".tsv.gz")):
+            for line in f:
+                if line.strip(): yield line.rstrip("\n").split("\t")
+            return
+        for line in f:
+            if not line.startswith("INSERT INTO"): continue
+            row = None
+            for m in _SQL_TOKEN.finditer(line, line.index(" VALUES ") + 8):
+                text, literal, punct = m.groups()
+                if punct == "(": row = []
+                elif punct == ")": yield row; row = None
+                elif row is None: continue
+                elif text is not None: row.append(_SQL_ESCAPE.sub(lambda e: _SQL_UNESCAPE.get(e.group(1), e.group(1)), text))
+                elif literal is not None: row.append(literal.strip())
+
+def _dump_title(raw):
+    return raw.replace("_", " ")
+
+def _build_csr(n, src, dst):
+    counts = [0] * (n + 1)
+    for u in src: counts[u + 1] += 1
+    for i in range(n): counts[i + 1] += counts[i]
+    offsets = array.array("q", counts)
+    neighbors = array.array("i", bytes(4 * len(src)))
+    fill = counts[:-1]
+    for u, v in zip(src, dst):
+        neighbors[fill[u]] = v; fill[u] += 1
+    return offsets, neighbors
+
+def _write_aligned(f, data):
+    f.write(data)
+    pad = -f.tell() % 8
+    if pad: f.write(b"\0" * pad)
+
+# page 덤프: (page_id, namespace, title, is_redirect, ...) / TSV 는 id, ns, title[, is_redirect]
+# pagelinks 덤프: 옛날 형식 (from, ns, title, from_ns) / 새 형식 (from, from_ns, target_id) + linktarget 덤프
+# redirect 덤프 주면 넘겨주기 문서로 가는 링크를 실제 문서로 합침
+def build_offline_graph(page_dump, pagelinks_dump, out_path, linktarget_dump=None, redirect_dump=None, log_func=print):
+    started = time.time()
+    log_func(f" [오프라인] 문서 목록 읽는 중: {page_dump}")
+    page_title = {}; redirect_ids = set()
+    for row in _dump_rows(page_dump):
+        if len(row) < 3 or row[1] != "0": continue
+        page_title[int(row[0])] = _dump_title(row[2])
+        if len(row) > 3 and row[3] == "1": redirect_ids.add(int(row[0]))
+
+    titles = sorted({t for pid, t in page_title.items() if pid not in redirect_ids})
+    index = {t: i for i, t in enumerate(titles)}     # 제목 정렬 순서 = 번호 (나중에 이진탐색)
+    target_index = dict(index)
+    if redirect_dump:
+        for row in _dump_rows(redirect_dump):
+            if len(row) < 3 or row[1] != "0": continue
+            source = page_title.get(int(row[0])); target = index.get(_dump_title(row[2]))
+            if source is not None and target is not None: target_index[source] = target
+    page_index = {pid: index[t] for pid, t in page_title.items() if pid not in redirect_ids}
+    log_func(f" [오프라인] 문서 {len(titles)}개")
+
+    link_target = {}
+    if linktarget_dump:
+        for row in _dump_rows(linktarget_dump):
+            if len(row) >= 3 and row[1] == "0": link_target[row[0]] = _dump_title(row[2])
+
+    src = array.array("i"); dst = array.array("i")
+    for row in _dump_rows(pagelinks_dump):
+        if len(row) == 3:   # 새 형식 - 대상이 제목이 아니라 linktarget 번호
+            if not linktarget_dump: raise ValueError("새 형식 pagelinks 덤프 (from, from_ns, target_id) 는 --linktarget 덤프가 같이 필요합니다")
+            title = link_target.get(row[2])
+        elif len(row) >= 3 and row[1] == "0":
+            title = _dump_title(row[2])
+        else: continue
+        u = page_index.get(int(row[0])); v = target_index.get(title)
+        if u is None or v is None or u == v: continue
+        src.append(u); dst.append(v)
+    log_func(f" [오프라인] 링크 {len(src)}개, CSR 변환 중...")
+
+    n = len(titles)
+    fwd_offsets, fwd_neighbors = _build_csr(n, src, dst)
+    rev_offsets, rev_neighbors = _build_csr(n, dst, src)
+    blob = bytearray(); title_offsets = array.array("q", [0])
+    for t in titles:
+        blob += t.encode("utf-8"); title_offsets.append(len(blob))
+
+    with open(out_path, "wb") as f:
+        f.write(OFFLINE_HEADER.pack(OFFLINE_MAGIC, n, len(src), len(blob)))
+        for part in (fwd_offsets, fwd_neighbors, rev_offsets, rev_neighbors, title_offsets):
+            if sys.byteorder != "little": part.byteswap()
+            _write_aligned(f, part.tobytes())
+        f.write(blob)
+    log_func(f" [오프라인] 저장 완료: {out_path} ({time.time() - started:.1f}초)")
+
+class OfflineGraph:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n, self.e, blob_len = OFFLINE_HEADER.unpack_from(self._mm, 0)
+        if magic != OFFLINE_MAGIC or sys.byteorder != "little": raise ValueError(f"오프라인 그래프 파일이 아님: {path}")
+        view = memoryview(self._mm); pos = OFFLINE_HEADER.size
+        sections = []
+        for count, code in ((self.n + 1, "q"), (self.e, "i"), (self.n + 1, "q"), (self.e, "i"), (self.n + 1, "q")):
+            size = count * (8 if code == "q" else 4)
+            sections.append(view[pos:pos + size].cast(code)); pos += size + (-size % 8)
+        fwd_offsets, fwd_neighbors, rev_offsets, rev_neighbors, self._title_offsets = sections
+        self._blob = view[pos:pos + blob_len]
+        self._adj = {"links": (fwd_offsets, fwd_neighbors), "linkshere": (rev_offsets, rev_neighbors)}
+
+    def title(self, i):
+        return bytes(self._blob[self._title_offsets[i]:self._title_offsets[i + 1]]).decode("utf-8")
+
+    # 제목 -> 번호 (없으면 -1). 제목이 정렬돼 있어서 dict 없이 이진탐색
+    def lookup(self, title):
+        key = normalize_title(title).encode("utf-8")
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self._blob[self._title_offsets[mid]:self._title_offsets[mid + 1]]) < key: lo = mid + 1
+            else: hi = mid
+        if lo < self.n and bytes(self._blob[self._title_offsets[lo]:self._title_offsets[lo + 1]]) == key: return lo
+        return -1
+
+    def neighbors(self, i, direction):
+        offsets, neighbors = self._adj[direction]
+        return neighbors[offsets[i]:offsets[i + 1]]
+
+# 오프라인 BFS - 양방향이면 작은 쪽 프론티어부터 확장
+def find_shortest_path_offline(graph, start, end, log_func, bidirectional=True, want_graph=False, stats=None, cancel=None):
+    stats = stats or RunStats()
+    cancel = cancel or CancelToken()
+    roles = {start: 'start', end: 'end'}
+    s = graph.lookup(start); t = graph.lookup(end)
+    if s < 0 or t < 0:
+        log_func(f" [오프라인] 덤프에 없는 문서: {start if s < 0 else end}")
+        return None, (build_search_graph([], roles, graph.title) if want_graph else None)
+    log_func(f" [오프라인] 탐색 시작: '{start}' -> '{end}' (문서 {graph.n}개, 링크 {graph.e}개)")
+    started = time.time()
+    parent_f = {s: -1}; parent_b = {t: -1}
+    frontier_f = [s]; frontier_b = [t]
+    path = [start] if s == t else None
+    depth = 0
+    while path is None and frontier_f and (frontier_b or not bidirectional) and depth < OFFLINE_MAX_DEPTH:
+        if cancel.cancelled:
+            stats.cancelled = cancel.reason
+            log_func(f" [오프라인] {cancel.reason} - Depth {depth} 에서 멈춤 (방문 {len(parent_f) + len(parent_b)}개)")
+            break
+        depth += 1
+        forward = not bidirectional or len(frontier_f) <= len(frontier_b)
+        frontier, parents, others, direction = (frontier_f, parent_f, parent_b, "links") if forward else (frontier_b, parent_b, parent_f, "linkshere")
+        level = stats.begin_depth(depth, direction, len(frontier))
+        nxt = []
+        for u in frontier:
+            neighbors = graph.neighbors(u, direction)
+            level["links"] += len(neighbors)
+            for v in neighbors:
+                if v in parents: continue
+                parents[v] = u
+                if v in others:
+                    path = _join_path(parent_f, parent_b, v, graph.title); break
+                nxt.append(v)
+            if path: break
+        if forward: frontier_f = nxt
+        else: frontier_b = nxt
+        log_func(f" [오프라인] Depth {depth}: {'정방향' if forward else '역방향'} {len(frontier)}개 확장")
+    stats.finish_depth()
+    stats.add(expanded=sum(level["frontier"] for level in stats.depths))
+
+    if path is None:
+        log_func(" [오프라인] 경로를 찾지 못했습니다.")
+        return None, (build_search_graph([], roles, graph.title) if want_graph else None)
+    log_func(f" [오프라인] 경로 발견 ({(time.time() - started) * 1000:.1f}ms, 방문 {len(parent_f) + len(parent_b)}개)")
+    if not want_graph: return path, None
+    # 오프라인은 방문 문서가 너무 많아서 경로만 그림
+    path_ids = [graph.lookup(title) for title in path]
+    edges = [i for pair in zip(path_ids, path_ids[1:]) for i in pair]
+    with stats.phase("graph_build"): return path, build_search_graph(edges, roles, graph.title)
+
+# ==============
+# 탐색 그래프 저장 / 불러오기 - 탐색하면서 본 그래프를 작은 바이너리 파일로 (다시 그리기 / 다음 탐색 캐시 채우기용)
+# 헤더 | 문서 플래그(uint8) | 링크(int32 a, b 쌍) | 제목 오프셋(int64) | 제목(utf-8) | 메타(JSON: 경로, 단계별 측정값)
+# 압축 안 하면 mmap 으로 복사 없이 바로 씀, 압축(zlib)하면 헤더 뒤를 통째로 풀어서 씀
+# ==============
+
+SUBGRAPH_MAGIC = b"WIKISUB1"
+SUBGRAPH_HEADER = struct.Struct("<8sIIQQQ")   # magic, 압축 여부, 문서 수, 링크 수, 제목 바이트 수, 메타 바이트 수
+SUBGRAPH_ROLES = ['normal', 'start', 'end', 'intersection']   # 플래그 아래 3비트
+SUBGRAPH_EXPANDED = {"links": 8, "linkshere": 16}             # 이 방향 링크를 다 받은 문서 (캐시 채울 수 있음)
+
+def save_search_graph(out_path, G, path, stats=None, compress=False):
+    title_of = G.graph.get("title_of")
+    nodes = list(G.nodes())
+    index = {title: i for i, title in enumerate(nodes)}
+    flags = bytearray(SUBGRAPH_ROLES.index(G.nodes[title].get('type', 'normal')) for title in nodes)
+    if title_of is not None:   # 탐색에서 바로 나온 그래프 - 링크 방향, 다 받은 문서 표시까지 저장
+        edges = array.array("i", (index[title_of(i)] for i in G.graph["edges"]))
+        for direction, ids in G.graph["expanded"].items():
+            for i in ids:
+                if title_of(i) in index: flags[index[title_of(i)]] |= SUBGRAPH_EXPANDED[direction]
+    else:
+        edges = array.array("i", (index[title] for edge in G.edges() for title in edge))
+    blob = bytearray(); title_offsets = array.array("q", [0])
+    for title in nodes:
+        blob += title.encode("utf-8"); title_offsets.append(len(blob))
+    meta = json.dumps({"path": path, "depths": list(stats.depths) if stats else [], "saved": time.time()}, ensure_ascii=False).encode("utf-8")
+
+    body = io.BytesIO()
+    _write_aligned(body, bytes(flags))
+    for part in (edges, title_offsets):
+        if sys.byteorder != "little": part.byteswap()
+        _write_aligned(body, part.tobytes())
+    body.write(blob); body.write(meta)
+    data = zlib.compress(body.getvalue(), 6) if compress else body.getvalue()
+    with open(out_path, "wb") as f:
+        f.write(SUBGRAPH_HEADER.pack(SUBGRAPH_MAGIC, int(compress), len(nodes), len(edges) // 2, len(blob), len(meta)))
+        f.write(data)
+    return SUBGRAPH_HEADER.size + len(data)
+
+class SavedSearchGraph:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, compressed, self.n, self.e, blob_len, meta_len = SUBGRAPH_HEADER.unpack_from(self._mm, 0)
+        if magic != SUBGRAPH_MAGIC or sys.byteorder != "little": raise ValueError(f"탐색 그래프 파일이 아님: {path}")
+        view = memoryview(zlib.decompress(self._mm[SUBGRAPH_HEADER.size:]) if compressed else self._mm)[0 if compressed else SUBGRAPH_HEADER.size:]
+        self.flags = view[:self.n]; pos = self.n + (-self.n % 8)
+        self.edges = view[pos:pos + 8 * self.e].cast("i"); pos += 8 * self.e
+        self._title_offsets = view[pos:pos + 8 * (self.n + 1)].cast("q"); pos += 8 * (self.n + 1)
+        self._blob = view[pos:pos + blob_len]
+        meta = json.loads(bytes(view[pos + blob_len:pos + blob_len + meta_len]))
+        self.path, self.depths, self.saved = meta["path"], meta["depths"], meta["saved"]
+
+    def title(self, i):
+        return bytes(self._blob[self._title_offsets[i]:self._title_offsets[i + 1]]).decode("utf-8")
+
+    def roles(self):
+        return {self.title(i): SUBGRAPH_ROLES[flag & 7] for i, flag in enumerate(self.flags) if flag & 7}
+
+    def expanded(self):
+        return {direction: [i for i, flag in enumerate(self.flags) if flag & bit] for direction, bit in SUBGRAPH_EXPANDED.items()}
+
+    def graph(self):
+        return build_search_graph(self.edges, self.roles(), self.title, self.expanded())
+
+    # 링크를 다 받은 문서는 링크 캐시에, 경로는 쿼리 캐시에 넣음 (저장한 시각 기준이라 오래된 건 캐시 TTL 로 알아서 빠짐)
+    # 넘겨주기로 합친 원래 문서도 링크로 같이 들어감 (탐색 결과는 같음)
+    def seed(self, cache=None, memo=None):
+        cache = cache or LINK_CACHE; memo = memo or QUERY_CACHE
+        links = {direction: {} for direction in SUBGRAPH_EXPANDED}
+        forward, backward = SUBGRAPH_EXPANDED["links"], SUBGRAPH_EXPANDED["linkshere"]
+        for k in range(0, len(self.edges), 2):
+            a, b = self.edges[k], self.edges[k + 1]
+            if self.flags[a] & forward: links["links"].setdefault(a, {})[b] = None
+            if self.flags[b] & backward: links["linkshere"].setdefault(b, {})[a] = None
+        for direction, bit in SUBGRAPH_EXPANDED.items():
+            for i, flag in enumerate(self.flags):
+                if flag & bit: links[direction].setdefault(i, {})    # 링크가 하나도 없는 문서
+            if links[direction]:
+                cache.put_many(direction, {self.title(u): [self.title(v) for v in vs] for u, vs in links[direction].items()}, fetched=self.saved)
+        if self.path and time.time() - self.saved <= memo.ttl:
+            memo.put_path(self.path[0], self.path[-1], self.path)
+        return sum(len(found) for found in links.values())
+
+    # GUI 없이 PNG 로 다시 그리기
+    def render(self, out_path):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        G = self.graph()
+        fig = Figure(figsize=(9, 5), facecolor='#2b2b2b')
+        draw_render_scene(fig.add_subplot(111), build_render_scene(G, self.path or [title for title, role in self.roles().items() if role == 'start']))
+        FigureCanvasAgg(fig).print_png(out_path)
+
+# 빠른 경로 확인 - 각 단계 문서 HTML 에서 다음 문서로 가는 링크가 본문에 있는지만 봄 (브라우저 없음, 단계당 수 ms)
+# mw-content-text 안의 <a title="..."> 만 모음. 제목 -> 넘겨주기 링크인지
+class ContentLinkParser(html.parser.HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = {}
+        self._depth = 0     # mw-content-text 안이면 div 중첩 깊이
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._depth:
+            if tag == "div": self._depth += 1
+            elif tag == "a" and attrs.get("title"):
+                classes = (attrs.get("class") or "").split()
+                if "new" not in classes: self.links.setdefault(normalize_title(attrs["title"]), "mw-redirect" in classes)   # new = 없는 문서(빨간 링크)
+        elif tag == "div" and attrs.get("id") == "mw-content-text": self._depth = 1
+
+    def handle_endtag(self, tag):
+        if self._depth and tag == "div": self._depth -= 1
+
+def fetch_page_html(title):
+    import urllib.request
+    request = urllib.request.Request(WIKI + urllib.parse.quote(title.replace(" ", "_")), headers=HEADERS)
+    with urllib.request.urlopen(request, timeout=10) as response: return response.read().decode("utf-8", "replace")
+
+# fetch_html(제목) -> HTML (기본은 위키에서 받음, 로컬 파일로 바꿔서 테스트 가능)
+# 반환: 단계마다 실제로 누를 링크 제목 (경로는 원래 문서 제목이라 본문 링크가 넘겨주기면 그 별칭), 못 찾으면 None
+def verify_path_links(path, fetch_html=None, log_func=None):
+    fetch_html = fetch_html or fetch_page_html
+    log_func = log_func or (lambda message: None)
+    def check(i):
+        parser = ContentLinkParser()
+        try: parser.feed(fetch_html(path[i]))
+        except (OSError, ValueError) as e:
+            log_func(f" [확인] '{path[i]}' 문서를 못 받음: {e}"); return None
+        target = normalize_title(path[i + 1])
+        if target in parser.links: return target
+        aliases = [title for title, redirect in parser.links.items() if redirect]
+        if aliases and RESOLVE_REDIRECTS:
+            canonical = asyncio.run(resolve_titles(aliases, RunStats()))
+            for alias in aliases:
+                if canonical[alias] == target: return alias
+        return None
+    anchors = list(get_io_pool().map(check, range(len(path) - 1)))
+    for curr, next_p, anchor in zip(path, path[1:], anchors):
+        if anchor is None: log_func(f" [확인] '{curr}' 본문에 '{next_p}' 링크 없음")
+    return anchors
+
+# 브라우저 세션 재사용 - 드라이버 설치/실행은 처음 한 번만 (창이 닫혔거나 headless 가 바뀌면 새로), 끝날 때 닫음
+DEMO_WAIT = 10          # 페이지 로드 / 애니메이션 기다리는 최대 시간 (초)
+DEMO_PAUSE = 1.0        # 확대한 링크 보여주는 시간 (animate 일 때만)
+_driver = None
+_driver_headless = None
+_driver_lock = threading.Lock()
+
+def get_driver(headless=False):
+    global _driver, _driver_headless
+    with _driver_lock:
+        if _driver is not None and _driver_headless == headless:
+            try:
+                _driver.current_url     # 살아있는지 확인
+                return _driver
+            except Exception: pass
+        _close_driver()
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
         os.environ['WDM_SSL_VERIFY'] = '0'
-        
         chrome_options = Options()
-        chrome_options.add_argument("--start-fullscreen")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.implicitly_wait(3)
-        
+        chrome_options.add_argument("--headless=new" if headless else "--start-fullscreen")
+        _driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        _driver.set_script_timeout(DEMO_WAIT)
+        _driver_headless = headless
+        import atexit
+        atexit.register(close_driver)
+        return _driver
+
+def _close_driver():
+    global _driver
+    if _driver is not None:
+        try: _driver.quit()
+        except Exception: pass
+        _driver = None
+
+def close_driver():
+    with _driver_lock: _close_driver()
+
+# 링크 위치 기준으로 화면 확대/축소 - transition 끝날 때까지 기다림 (sleep 대신)
+_ZOOM_SCRIPT = """
+var link = arguments[0], scale = arguments[1], done = arguments[arguments.length - 1];
+var body = document.body, rect = link.getBoundingClientRect();
+if (body.style.transform === 'scale(' + scale + ')') { done(); return; }
+body.style.transformOrigin = (rect.left + window.scrollX + rect.width / 2) + 'px ' + (rect.top + window.scrollY + rect.height / 2) + 'px';
+body.style.transition = 'transform 0.6s ease-in-out';
+body.addEventListener('transitionend', function end() { body.removeEventListener('transitionend', end); done(); });
+body.style.transform = 'scale(' + scale + ')';
+"""
+
+# 셀레니움 시연 함수
+# anchors = verify_path_links 결과 (단계마다 누를 링크 제목). animate=False 면 강조 효과 없이 바로 클릭
+def show_path_selenium(path, log_func, anchors=None, headless=False, animate=True):
+    if not path: return False # 실패 반환
+    try:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import NoSuchElementException
+    except ImportError:
+        log_func("\n [자동 시연] selenium 이 없어서 브라우저 시연은 건너뜁니다.")
+        return True   # 시연을 못 한 거지 경로가 틀린 건 아님 (2차 탐색 안 함)
+
+    anchors = anchors or path[1:]
+    log_func("\n [자동 시연] 브라우저를 실행합니다...")
+    success = False # 성공 여부 추적
+
+    try:
+        driver = get_driver(headless)
+        wait = WebDriverWait(driver, DEMO_WAIT)
+        content = (By.ID, "mw-content-text")
+
         driver.get(WIKI + path[0])
+        wait.until(EC.presence_of_element_located(content))
         log_func(f" 시작 페이지 이동: {path[0]}")
-        
-        for i in range(len(path) - 1):
-            curr, next_p = path[i], path[i+1]
+
+        for curr, next_p, anchor in zip(path, path[1:], anchors):
             log_func(f" '{curr}' -> '{next_p}' 찾는 중...")
             link = None
-            try:
-                content = driver.find_element(By.ID, "mw-content-text")
-                link = content.find_element(By.CSS_SELECTOR, f"a[title='{next_p}']")
-            except NoSuchElementException: pass
-            if not link:
+            quoted = (anchor or next_p).replace("\\", "\\\\").replace("'", "\\'")
+            try: link = driver.find_element(*content).find_element(By.CSS_SELECTOR, f"a[title='{quoted}']")
+            except NoSuchElementException:
                 try: link = driver.find_element(By.LINK_TEXT, next_p)
                 except NoSuchElementException: pass
-            if not link:
-                try: link = driver.find_element(By.PARTIAL_LINK_TEXT, next_p)
-                except NoSuchElementException: pass
 
-            if link:
-                try:
-                    driver.execute_script("arguments[0].style.backgroundColor='yellow'; arguments[0].style.border='3px solid red';", link)
-                    driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", link)
-                    time.sleep(1.5)
-                    
-                    driver.execute_script("document.body.style.transition = 'transform 1.0s ease-in-out';")
-                    zoom_script = """
-                    var element = arguments[0];
-                    var rect = element.getBoundingClientRect();
-                    var cx = rect.left + window.scrollX + (rect.width / 2);
-                    var cy = rect.top + window.scrollY + (rect.height / 2);
-                    document.body.style.transformOrigin = cx + 'px ' + cy + 'px';
-                    document.body.style.transform = 'scale(2.0)';
-                    """
-                    driver.execute_script(zoom_script, link)
-                    log_func(f"   !  발견 강조 효과")
-                    time.sleep(2)
-
-                    driver.execute_script("document.body.style.transform = 'scale(1.0)';")
-                    time.sleep(1.0)
-
-                    try: link.click()
-                    except (ElementNotInteractableException, Exception):
-                        driver.execute_script("arguments[0].click();", link)
-                except Exception as e: 
-                    log_func(f" 발견 but 클릭 오류: {e}")
-                    success = False
-                    break
-            else: 
+            if link is None:
                 log_func(f"# 링크를 화면에서 찾을 수 없음: {next_p}")
-                success = False # 실패 기록
+                break   # 실패 기록
+            try:
+                if animate:
+                    driver.execute_script("arguments[0].style.backgroundColor='yellow'; arguments[0].style.border='3px solid red'; arguments[0].scrollIntoView({block: 'center'});", link)
+                    driver.execute_async_script(_ZOOM_SCRIPT, link, 2.0)
+                    log_func(f"   !  발견 강조 효과")
+                    time.sleep(DEMO_PAUSE)
+                    driver.execute_async_script(_ZOOM_SCRIPT, link, 1.0)
+                try: link.click()
+                except Exception: driver.execute_script("arguments[0].click();", link)
+                wait.until(EC.staleness_of(link))      # 다음 페이지로 넘어갈 때까지
+                wait.until(EC.presence_of_element_located(content))
+            except Exception as e:
+                log_func(f" 발견 but 클릭 오류: {e}")
                 break
         else:
             # for문이 break 없이 끝나면 성공
-            log_func("V 시연 완료! 10초 후 종료됩니다.")
+            log_func("V 시연 완료! (브라우저는 다음 시연까지 열어둠)")
             success = True
-            time.sleep(10)
 
-    except Exception as e: 
+    except Exception as e:
         log_func(f"# 셀레니움 오류: {e}")   # 와이파이 이슈일수 있음.
+        close_driver()   # 세션이 망가졌을 수 있으니 다음엔 새로
         success = False
-    finally:
-        if driver: driver.quit()
-        
+
     return success # 성공/실패 여부 반환
 
+# =========
+# 명령줄(헤드리스) 실행 - GUI / matplotlib / selenium 안 불러옴
+# =========
+
+# 파일 한 줄에 "시작<TAB>목표" (# 으로 시작하면 주석). "-" 면 표준입력
+def read_pairs(path):
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        pairs = []
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"): continue
+            start, _, end = line.partition("\t")
+            if start.strip() and end.strip(): pairs.append((start.strip(), end.strip()))
+        return pairs
+    finally:
+        if f is not sys.stdin: f.close()
+
+def read_titles(path):
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try: return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    finally:
+        if f is not sys.stdin: f.close()
+
+def run_query(start, end, graph=None, log_func=None, stats=None, cancel=None, hubs=None, verify=False, save_graph=None):
+    log_func = log_func or (lambda message: None)
+    stats = stats or RunStats()
+    started = time.time()
+    path, G = find_shortest_path(start, end, log_func, graph=graph, want_graph=bool(save_graph), stats=stats, cancel=cancel, hubs=hubs)
+    record = {"start": start, "end": end, "path": path, "depth": len(path) - 1 if path else None, "seconds": round(time.time() - started, 3)}
+    if save_graph: record["graph_bytes"] = save_search_graph(save_graph, G, path, stats, compress=save_graph.endswith(".z"))
+    if verify: record["verified"] = bool(path) and None not in verify_path_links(path, log_func=log_func)
+    record.update(stats.as_dict())
+    return record
+
+# 여러 쌍을 동시에 탐색 (링크 캐시, 요청 스레드풀, 속도 제한은 전부 공유) -> 끝나는 대로 JSON 한 줄씩
+# metrics_path 주면 쌍마다 측정값도 파일로 (.prom = Prometheus 텍스트, 그 외 JSON)
+# timeout(초) / max_requests 는 쌍마다 따로. 넘으면 그 쌍은 path=None, cancelled=이유 로 기록
+def run_batch(pairs, out, jobs=4, graph=None, log_func=None, metrics_path=None, timeout=None, max_requests=None, hubs=None, verify=False, save_graph=None):
+    write_lock = threading.Lock()
+    found = 0
+    runs = [({"start": start, "end": end}, RunStats()) for start, end in pairs]
+    tokens = {}   # 시간 제한은 탐색 시작할 때부터 재야 해서 쌍마다 시작할 때 만듦
+    def job(i):
+        labels, stats = runs[i]
+        tokens[i] = CancelToken(timeout, max_requests)
+        return run_query(labels["start"], labels["end"], graph, log_func, stats, tokens[i], hubs, verify, save_graph)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(job, i) for i in range(len(runs))]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                record = future.result()
+                found += record["path"] is not None
+                with write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n"); out.flush()
+        except KeyboardInterrupt:   # Ctrl+C -> 돌고 있는 탐색 전부 바로 멈춤
+            for future in futures: future.cancel()
+            for token in list(tokens.values()): token.cancel("중단")
+            raise
+    if metrics_path: export_metrics(metrics_path, runs)
+    return found
+
+# =========
+# 벤치마크 - 로컬 가짜 위키 API 서버에 고정된 쌍들을 탐색시켜서 성능 측정
+# =========
+
+BENCH_PAIRS = 20
+BENCH_SEED = 1323
+
+# 합성 그래프 - 몇 개 허브 문서로 링크가 몰리는 모양 (실제 위키랑 비슷하게)
+# OfflineGraph 랑 같은 인터페이스 (n, title, lookup, neighbors) 라서 덤프 그래프로 바꿔 끼울 수 있음
+class SyntheticGraph:
+    def __init__(self, n=20000, seed=BENCH_SEED):
+        rng = random.Random(seed)
+        self.n = n
+        self._titles = [f"문서 {i}" for i in range(n)]
+        self._index = {t: i for i, t in enumerate(self._titles)}
+        hubs = range(max(1, n // 200))
+        out = [set() for _ in range(n)]
+        for u in range(n):
+            for _ in range(min(int(rng.paretovariate(1.5) * 8), n // 10)):
+                v = rng.choice(hubs) if rng.random() < 0.2 else rng.randrange(n)
+                if v != u: out[u].add(v)
+        for h in hubs: out[h].update(rng.sample(range(n), min(n - 1, 300)))
+        back = [[] for _ in range(n)]
+        for u in range(n):
+            out[u].discard(u)
+            for v in out[u]: back[v].append(u)
+        self._adj = {"links": [sorted(s) for s in out], "linkshere": [sorted(s) for s in back]}
+        self.e = sum(len(s) for s in out)
+
+    def title(self, i):
+        return self._titles[i]
+
+    def lookup(self, title):
+        return self._index.get(normalize_title(title), -1)
+
+    def neighbors(self, i, direction):
+        return self._adj[direction][i]
+
+# action=query + prop=links/linkshere 응답 흉내. continue 는 "문서번호|위치"
+def mock_api_response(graph, params, page_limit):
+    direction = params.get("prop")
+    pre = PREFIX.get(direction)
+    limit = page_limit
+    if pre and params.get(pre + "limit", "max") != "max": limit = min(limit, int(params[pre + "limit"]))
+    cont = params.get(pre + "continue") if pre else None
+    start_i, start_off = map(int, cont.split("|")) if cont else (-1, 0)
+    pages = {}; normalized = []; ids = []
+    for title in params.get("titles", "").split("|"):
+        if not title: continue
+        norm = normalize_title(title)
+        if norm != title: normalized.append({"from": title, "to": norm})
+        i = graph.lookup(norm)
+        if i < 0: pages[str(-1 - len(pages))] = {"ns": 0, "title": norm, "missing": ""}
+        else: ids.append(i)
+    budget = limit; next_cont = None
+    for i in sorted(set(ids)):
+        page = {"pageid": i + 1, "ns": 0, "title": graph.title(i)}
+        if pre and next_cont is None and i >= start_i:
+            neighbors = graph.neighbors(i, direction)
+            offset = start_off if i == start_i else 0
+            take = neighbors[offset:offset + budget]
+            if len(take): page[direction] = [{"ns": 0, "title": graph.title(v)} for v in take]
+            budget -= len(take)
+            if offset + len(take) < len(neighbors): next_cont = f"{i}|{offset + len(take)}"
+        pages[str(i + 1)] = page
+    query = {"pages": list(pages.values()) if params.get("formatversion") == "2" else pages}
+    if normalized: query["normalized"] = normalized
+    data = {"batchcomplete": ""} if next_cont is None else {"continue": {pre + "continue": next_cont, "continue": "||"}}
+    data["query"] = query
+    return data
+
+class MockWikiServer:
+    def __init__(self, graph, latency=0.0, page_limit=500):
+        import http.server
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            def log_message(self, *args): pass
+            def do_GET(self):
+                with server._lock: server.requests += 1
+                if latency: time.sleep(latency)
+                params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+                # 실제 위키처럼 - formatversion=1 은 한글을 \uXXXX 로, Accept-Encoding 에 gzip 있으면 압축
+                body = json.dumps(mock_api_response(graph, params, page_limit), ensure_ascii=params.get("formatversion") != "2").encode("utf-8")
+                gzipped = "gzip" in (self.headers.get("Accept-Encoding") or "")
+                if gzipped: body = gzip.compress(body, 5)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                if gzipped: self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/w/api.php"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._httpd.shutdown(); self._httpd.server_close()
+
+def bench_pairs(graph, count=BENCH_PAIRS, seed=BENCH_SEED):
+    rng = random.Random(seed)
+    return [tuple(graph.title(i) for i in rng.sample(range(graph.n), 2)) for _ in range(count)]
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+# 쌍마다 빈 캐시로 (콜드 상태) 탐색. 속도 제한은 로컬 서버라 끔
+def run_benchmark(graph=None, pairs=None, latency=0.02, page_limit=500, log_func=print):
+    import tracemalloc
+    global API, LINK_CACHE, RATE_LIMITER, QUERY_CACHE
+    graph = graph or SyntheticGraph()
+    pairs = pairs or bench_pairs(graph)
+    server = MockWikiServer(graph, latency=latency, page_limit=page_limit)
+    saved = API, LINK_CACHE, RATE_LIMITER, QUERY_CACHE
+    API, RATE_LIMITER = server.url, RateLimiter(1e9, 1e9)
+    log_func(f" [벤치마크] 문서 {graph.n}개 / 링크 {graph.e}개, {len(pairs)}쌍, 지연 {latency * 1000:.0f}ms, 페이지당 {page_limit}개")
+    queries = []
+    tracemalloc.start()
+    try:
+        for start, end in pairs:
+            LINK_CACHE = LinkCache(":memory:"); QUERY_CACHE = QueryCache()
+            stats = RunStats()
+            tracemalloc.reset_peak()
+            before = server.requests
+            started = time.perf_counter()
+            path, _ = find_shortest_path(start, end, lambda message: None, stats=stats)
+            queries.append({"start": start, "end": end, "depth": len(path) - 1 if path else None, "seconds": time.perf_counter() - started,
+                            "requests": server.requests - before, "expanded": stats.expanded, "peak_mb": tracemalloc.get_traced_memory()[1] / 2**20})
+    finally:
+        tracemalloc.stop()
+        API, LINK_CACHE, RATE_LIMITER, QUERY_CACHE = saved
+        server.close()
+    times = [q["seconds"] for q in queries]
+    summary = {"pairs": len(queries), "found": sum(q["depth"] is not None for q in queries), "wall_seconds": round(sum(times), 3),
+               "requests": sum(q["requests"] for q in queries), "expanded": sum(q["expanded"] for q in queries),
+               "peak_mb": round(max(q["peak_mb"] for q in queries), 2), "p50_seconds": round(_percentile(times, 0.5), 4), "p95_seconds": round(_percentile(times, 0.95), 4)}
+    for key, value in summary.items(): log_func(f"   {key:>13}: {value}")
+    return {"summary": summary, "queries": queries}
+
+# 기준 결과랑 비교 (낮을수록 좋은 값들)
+def compare_benchmark(result, baseline, log_func=print):
+    log_func(" [벤치마크] 기준 대비")
+    for key in ("wall_seconds", "requests", "expanded", "peak_mb", "p50_seconds", "p95_seconds"):
+        old, new = baseline["summary"].get(key), result["summary"][key]
+        if not old: continue
+        log_func(f"   {key:>13}: {old} -> {new} ({(new - old) / old * 100:+.1f}%)")
+    if result["summary"]["found"] != baseline["summary"].get("found"):
+        log_func(f"   ! 찾은 경로 수가 다름: {baseline['summary'].get('found')} -> {result['summary']['found']}")
+
+# =========
+# 그래프 그리기 준비 - 배치 계산은 작업 스레드에서 NumPy 로, GUI 스레드는 그리기만
+# 큰 그래프는 경로 문서 + 경로 문서마다 링크 많은 이웃 top-k 만 남기고 나머지는 (가까운 경로 문서, 거리) 묶음으로 합침
+# =========
+
+RENDER_MAX_NODES = 500     # 이거 넘으면 줄여서 그림
+RENDER_TOP_K = 15
+NODE_STYLE = {'path': ('#f1c40f', 400), 'start': ('#3498db', 300), 'end': ('#e74c3c', 300), 'normal': ('#95a5a6', 50), 'bucket': ('#7f8c8d', 0)}
+
+# 경로 문서들에서 동시에 BFS -> 문서마다 (가장 가까운 경로 문서 번호, 거리)
+def _path_anchors(G, path):
+    anchor = {node: (i, 0) for i, node in enumerate(path)}
+    frontier = list(path)
+    while frontier:
+        nxt = []
+        for u in frontier:
+            a, d = anchor[u]
+            for v in G.adj[u]:
+                if v not in anchor: anchor[v] = (a, d + 1); nxt.append(v)
+        frontier = nxt
+    return anchor
+
+# 반환: {"xy", "colors", "sizes", "segments", "path_xy", "labels", "hidden"} (좌표는 numpy 배열)
+def build_render_scene(G, path, max_nodes=RENDER_MAX_NODES, top_k=RENDER_TOP_K):
+    import numpy as np
+    path_set = set(path)
+    px = np.linspace(-3.0, 3.0, len(path)) if len(path) > 1 else np.zeros(1)
+    def kind(node):
+        if node in path_set: return 'path'
+        role = G.nodes[node].get('type')
+        return role if role in ('start', 'end') else 'normal'
+
+    if G.number_of_nodes() <= max_nodes:
+        import networkx as nx
+        fixed_pos = {node: (px[i], 0.0) for i, node in enumerate(path)}
+        pos = nx.spring_layout(G, pos=fixed_pos, fixed=fixed_pos.keys(), k=0.5, iterations=30) if len(G) > len(path) else fixed_pos
+        nodes = list(G.nodes())
+        xy = np.array([pos[n] for n in nodes], dtype=float).reshape(-1, 2)
+        index = {n: i for i, n in enumerate(nodes)}
+        edge_index = np.array([(index[a], index[b]) for a, b in G.edges()], dtype=int).reshape(-1, 2)
+        segments = xy[edge_index]
+        path_xy = np.array([xy[index[n]] for n in path]).reshape(-1, 2)
+        styles = [NODE_STYLE[kind(n)] for n in nodes]
+        hidden = 0
+    else:
+        anchor = _path_anchors(G, path)
+        # 경로 문서마다 링크 많은 이웃 top-k
+        kept = {}
+        for i, node in enumerate(path):
+            neighbors = sorted((v for v in G.adj[node] if v not in path_set and v not in kept), key=G.degree, reverse=True)
+            for v in neighbors[:top_k]: kept[v] = i
+        nodes = list(path) + list(kept)
+        # 이웃은 자기 경로 문서 주변 원 위에 고르게
+        rng = np.random.default_rng(1323)
+        owner = np.fromiter(kept.values(), dtype=int, count=len(kept))
+        rank = np.zeros(len(kept), dtype=int); count = np.bincount(owner, minlength=len(path)) if len(kept) else np.zeros(len(path), dtype=int)
+        seen = np.zeros(len(path), dtype=int)
+        for k, a in enumerate(owner): rank[k] = seen[a]; seen[a] += 1
+        angle = 2 * np.pi * rank / np.maximum(count[owner], 1) + owner * 0.7
+        radius = 0.6 + 0.25 * rng.random(len(kept))
+        neighbor_xy = np.column_stack([px[owner] + radius * np.cos(angle), 1.4 * radius * np.sin(angle)])
+        xy = np.vstack([np.column_stack([px, np.zeros(len(path))]), neighbor_xy])
+        index = {n: i for i, n in enumerate(nodes)}
+        edge_index = np.array([(index[a], index[b]) for a, b in G.subgraph(nodes).edges()], dtype=int).reshape(-1, 2)
+        styles = [NODE_STYLE[kind(n)] for n in nodes]
+        # 나머지는 (경로 문서, 거리) 묶음 하나로 - 크기는 문서 수 로그
+        buckets = {}
+        for node, key in anchor.items():
+            if node not in index: buckets[key] = buckets.get(key, 0) + 1
+        hidden = sum(buckets.values())
+        if buckets:
+            keys = np.array(list(buckets.keys()), dtype=float).reshape(-1, 2); sizes = np.fromiter(buckets.values(), dtype=float)
+            side = np.where(keys[:, 0] % 2 == 0, -1.0, 1.0)
+            bucket_xy = np.column_stack([px[keys[:, 0].astype(int)] + 0.15 * (keys[:, 1] - 1), side * (1.3 + 0.45 * keys[:, 1])])
+            first = len(xy)
+            xy = np.vstack([xy, bucket_xy])
+            bucket_edges = np.column_stack([keys[:, 0].astype(int), np.arange(first, first + len(keys))])
+            edge_index = np.vstack([edge_index, bucket_edges])
+            styles += [(NODE_STYLE['bucket'][0], float(30 + 60 * np.log10(c + 1))) for c in sizes]
+        segments = xy[edge_index]
+        path_xy = xy[:len(path)]
+
+    return {"xy": xy, "colors": [c for c, _ in styles], "sizes": np.array([s for _, s in styles], dtype=float),
+            "segments": segments, "path_xy": path_xy, "labels": list(path), "hidden": hidden, "total": G.number_of_nodes()}
+
+# 한 번에 그리기: 선은 LineCollection 하나, 점은 scatter 하나
+def draw_render_scene(ax, scene):
+    from matplotlib.collections import LineCollection
+    ax.set_axis_off()
+    if len(scene["segments"]): ax.add_collection(LineCollection(scene["segments"], colors='#ecf0f1', alpha=0.1, linewidths=0.5))
+    ax.scatter(scene["xy"][:, 0], scene["xy"][:, 1], c=scene["colors"], s=scene["sizes"], alpha=0.3, linewidths=0)
+    path_xy = scene["path_xy"]
+    ax.plot(path_xy[:, 0], path_xy[:, 1], color='#f1c40f', linewidth=3.0, zorder=3)
+    ax.scatter(path_xy[:, 0], path_xy[:, 1], c='#f1c40f', s=400, zorder=4)
+    for (x, y), label in zip(path_xy, scene["labels"]):
+        ax.text(x, y, label, fontsize=9, color='white', fontweight='bold', fontfamily='Malgun Gothic', ha='center', va='center', zorder=5)
+    if scene["hidden"]:
+        ax.text(0.01, 0.01, f"문서 {scene['total']}개 중 {scene['hidden']}개는 묶어서 표시", transform=ax.transAxes, fontsize=8, color='gray', fontfamily='Malgun Gothic')
+    ax.autoscale_view()
+
+# 탐색 중 실시간 그래프 - 새 문서가 들어올 때마다 점/선만 추가하고 다시 그림 (처음부터 다시 안 그림)
+# 정방향은 시작 문서에서 오른쪽으로, 역방향은 목표 문서에서 왼쪽으로 뻗어나감
+LIVE_MAX_NODES = 5000      # 이 이상은 개수만 셈
+LIVE_REDRAW_MS = 250
+
+class LiveGraphView:
+    def __init__(self, master, start, end):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.collections import LineCollection
+
+        self.fig = Figure(figsize=(9, 5), facecolor='#2b2b2b')
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_axis_off()
+        self.ax.set_xlim(-3.5, 3.5); self.ax.set_ylim(-3.0, 3.0)
+        self.pos = {start: (-3.0, 0.0), end: (3.0, 0.0)}
+        self.xy = [(-3.0, 0.0), (3.0, 0.0)]
+        self.colors = ['#3498db', '#e74c3c']
+        self.segments = []
+        self.total = 0
+        self.last_depth = 0
+        self.lines = LineCollection([], colors='#ecf0f1', alpha=0.15, linewidths=0.5)
+        self.ax.add_collection(self.lines)
+        self.points = self.ax.scatter([x for x, _ in self.xy], [y for _, y in self.xy], c=self.colors, s=30, alpha=0.6, linewidths=0)
+        self.status = self.ax.text(0.01, 0.01, "", transform=self.ax.transAxes, fontsize=8, color='gray', fontfamily='Malgun Gothic')
+        self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def add(self, update):
+        step = 0.7 if update["direction"] == "links" else -0.7
+        color = '#95a5a6' if update["direction"] == "links" else '#c0392b'
+        spread = 2.5 / update["depth"]
+        for title, parent in update["nodes"]:
+            self.total += 1
+            if title in self.pos or parent not in self.pos or len(self.xy) >= LIVE_MAX_NODES: continue
+            px, py = self.pos[parent]
+            point = (px + step * random.uniform(0.6, 1.0), max(-2.8, min(2.8, py + random.uniform(-spread, spread))))
+            self.pos[title] = point
+            self.xy.append(point); self.colors.append(color)
+            self.segments.append(((px, py), point))
+        self.last_depth = update["depth"]
+
+    def redraw(self):
+        self.lines.set_segments(self.segments)
+        self.points.set_offsets(self.xy)
+        self.points.set_facecolor(self.colors)
+        shown = len(self.xy) - 2
+        self.status.set_text(f"Depth {self.last_depth} · 찾은 문서 {self.total}개" + (f" (표시 {shown}개)" if shown < self.total else ""))
+        self.canvas.draw_idle()
+
 # =========
 # [B] GUI 화ㅏ면
 # =========
 
 class ModernWikiApp:
-    def __init__(self):
+    def __init__(self, offline_graph=None, metrics_path=None, hub_index=None):
+        self.offline_graph = offline_graph   # 있으면 API 대신 덤프 그래프로 탐색
+        self.metrics_path = metrics_path     # 있으면 탐색마다 측정값 저장
+        self.hub_index = hub_index           # 있으면 허브 경로를 상한으로 씀
         ctk.set_appearance_mode("Dark") 
         ctk.set_default_color_theme("blue") 
         
@@ -298,7 +2199,19 @@ class ModernWikiApp:
         self.main_container.pack(fill="both", expand=True)
         
         self.spinner_running = False
+        self.progress_queue = queue.Queue()   # 탐색 스레드 -> GUI 실시간 그래프
+        self.live_view = None
+        self.live_polling = False
+        self.live_after = None     # 예약해 둔 다음 _poll_progress (폴링 루프는 항상 하나만)
+        self.cancel_token = None
+        self.ready_seconds = None   # 창 뜰 때까지 걸린 시간 (로그 창 생기면 한 번 남김)
         self.setup_tutorial_ui()
+        self.root.after_idle(self._on_ready)
+
+    # 창 뜬 시간은 로그 창이 생기면 (setup_main_ui) 거기로
+    def _on_ready(self):
+        self.ready_seconds = time.perf_counter() - STARTED
+        threading.Thread(target=warm_imports, daemon=True).start()
 
     def setup_tutorial_ui(self):
         self.clear_frame(self.main_container)
@@ -345,12 +2258,16 @@ class ModernWikiApp:
         self.entry_end.pack(fill="x", padx=10, pady=(0, 10))
 
         self.btn_run = ctk.CTkButton(input_frame, text="탐색 시작", command=self.start_process, fg_color="#007bff")
-        self.btn_run.pack(fill="x", padx=10, pady=10)
+        self.btn_run.pack(fill="x", padx=10, pady=(10, 5))
+
+        self.btn_cancel = ctk.CTkButton(input_frame, text="탐색 취소", command=self.cancel_process, fg_color="#dc3545", state="disabled")
+        self.btn_cancel.pack(fill="x", padx=10, pady=(0, 10))
 
         ctk.CTkLabel(self.left_panel, text="실행 로그", font=ctk.CTkFont(size=12, weight="bold")).pack(pady=(20, 5), padx=20, anchor="w")
         self.log_area = ctk.CTkTextbox(self.left_panel, font=("Consolas", 11))
         self.log_area.pack(fill="both", expand=True, padx=20, pady=(0, 20))
         self.log_area.configure(state="disabled")
+        if self.ready_seconds is not None: self.log(f" [시작] 창 표시까지 {self.ready_seconds:.2f}초"); self.ready_seconds = None
 
         self.right_panel = ctk.CTkFrame(self.main_container, corner_radius=0, fg_color="#2b2b2b")
         self.toolbar_frame = ctk.CTkFrame(self.right_panel, fg_color="#2b2b2b", height=40)
@@ -416,26 +2333,30 @@ class ModernWikiApp:
             return
 
         self.btn_run.configure(state="disabled", text="탐색 중...")
+        self.btn_cancel.configure(state="normal")
+        self.cancel_token = CancelToken(SEARCH_TIMEOUT, SEARCH_MAX_REQUESTS)
         self.log_area.configure(state="normal")
         self.log_area.delete("1.0", "end")
         self.log_area.configure(state="disabled")
         
-        for widget in self.canvas_frame.winfo_children(): widget.destroy()
-        for widget in self.toolbar_frame.winfo_children(): widget.destroy()
+        self.clear_progress()
+        self.start_live_view(start, end)
 
-        thread = threading.Thread(target=self.run_logic, args=(start, end))
+        thread = threading.Thread(target=self.run_logic, args=(start, end, self.cancel_token))
         thread.daemon = True
         thread.start()
 
-    def run_logic(self, start, end):
-        pkgs = [p for p in PACKAGES if p != "customtkinter" and p != "matplotlib"]
-        if not install_packages(pkgs, self.log):
-            self.log(" 필수 패키지 설치 실패.")
-            self.reset_button(); return
+    def cancel_process(self):
+        if self.cancel_token is None: return
+        self.cancel_token.cancel()
+        self.btn_cancel.configure(state="disabled")
+        self.log("\n 취소 요청 - 보내는 중인 요청은 버리고 멈춥니다...")
 
+    def run_logic(self, start, end, cancel):
         # 1 시도
         start_time = time.time()
-        path, G = find_shortest_path(start, end, self.log)
+        stats = RunStats()
+        path, G = find_shortest_path(start, end, self.log, graph=self.offline_graph, want_graph=True, stats=stats, on_progress=self.progress_queue.put, cancel=cancel, hubs=self.hub_index)
         
         success = False
         
@@ -446,103 +2367,80 @@ class ModernWikiApp:
             self.log(f" {' -> '.join(path)}")
             
             # 그래프 및 시연
-            self._visualize_and_show(G, path)
-            success = show_path_selenium(path, self.log)
+            self._visualize_and_show(G, path, stats)
+            success = self.verify_and_show(path)
         
+        # 취소 / 시간·요청 제한에 걸렸으면 2차 탐색 안 함 (같은 제한을 1차 2차가 같이 씀)
+        if not success and cancel.cancelled:
+            self.log(f"\n [중단] {cancel.reason} - 2차 탐색은 하지 않습니다.")
+            self.log(stats.report())
+            self.reset_button(); return
+
         # 2. 실패 시 정방향 탐색
         if not success:
             self.log("\n [1차 시도 실패] 링크를 찾을 수 없어 '정방향 탐색'으로 재시도합니다...")
             self.log(" [2차 시도] 정방향 탐색 (Forward-Only) 시작...")
             
             start_time = time.time()
-            path, G = find_shortest_path_forward_only(start, end, self.log)
+            stats = RunStats()
+            self.clear_progress()
+            self.root.after(0, lambda: self.start_live_view(start, end))
+            path, G = find_shortest_path_forward_only(start, end, self.log, graph=self.offline_graph, want_graph=True, stats=stats, on_progress=self.progress_queue.put, cancel=cancel)
             
             if path:
                 duration = time.time() - start_time
                 self.log(f"\n [2차] 경로 발견! ({len(path)-1}단계, {duration:.2f}초)")
                 self.log(f" {' -> '.join(path)}")
                 
-                self._visualize_and_show(G, path)
-                show_path_selenium(path, self.log)
+                self._visualize_and_show(G, path, stats)
+                self.verify_and_show(path)
+            elif cancel.cancelled:
+                self.log(stats.report())
             else:
                 self.log("\n 정방향 탐색으로도 경로를 찾지 못했습니다.ㅠ\n 입력한 단어가 위키피디아에 존재하는 글인지 다시 확인해주세요!")
 
         self.reset_button()
 
+    # 브라우저 띄우기 전에 HTML 로 링크가 다 있는지 먼저 확인 (없으면 브라우저 안 띄우고 실패)
+    def verify_and_show(self, path):
+        started = time.perf_counter()
+        anchors = verify_path_links(path, log_func=self.log)
+        self.log(f" [확인] {len(anchors)}단계 링크 확인 {(time.perf_counter() - started) * 1000:.0f}ms")
+        if None in anchors: return False
+        return show_path_selenium(path, self.log, anchors)
+
 # 그래프 그리는 함수
-    def _visualize_and_show(self, G, path):
+    def _visualize_and_show(self, G, path, stats):
+        self.last_search = (G, path, stats)
         self.start_spinner(f" 그래프 배치 계산 중 (노드 {G.number_of_nodes()}개)...  ")
-        import networkx as nx
         try:
-            fixed_pos = {}
-            path_len = len(path)
-            for i, node in enumerate(path):
-                x_pos = -3.0 + (6.0 * i / (path_len - 1))
-                fixed_pos[node] = (x_pos, 0.0)
-    
-    # 데이터 로딩 너무 김        
-            if G.number_of_nodes() > 500:
-                self.log("\n 데이터가 많아 랜덤 배치 모드를 사용합니다.")
-                pos = {}
-                import random
-                for node in G.nodes():
-                    if node in fixed_pos: pos[node] = fixed_pos[node]
-                    else: pos[node] = (random.uniform(-3.5, 3.5), random.uniform(-2.5, 2.5))
-            else:
-                pos = nx.spring_layout(G, pos=fixed_pos, fixed=fixed_pos.keys(), k=0.5, iterations=30)
-            
+            with stats.phase("layout"):
+                if G.number_of_nodes() > RENDER_MAX_NODES:
+                    self.log(f"\n 데이터가 많아 경로 주변 {RENDER_TOP_K}개 이웃만 남기고 나머지는 묶어서 표시합니다.")
+                scene = build_render_scene(G, path)
             self.stop_spinner()
-            self.root.after(0, lambda: self.reveal_and_draw_graph(G, path, pos))
+            self.root.after(0, lambda: self.reveal_and_draw_graph(scene, stats))
         except Exception as e:
             self.stop_spinner()
             self.log(f" 그래프 계산 오류: {e}")
 
-    def reveal_and_draw_graph(self, G, path, pos):
+    def reveal_and_draw_graph(self, scene, stats):
+        self.stop_live_view()
+        for widget in self.canvas_frame.winfo_children(): widget.destroy()
+        for widget in self.toolbar_frame.winfo_children(): widget.destroy()
         self.show_graph_panel()
-        self.draw_graph_in_gui(G, path, pos)
+        with stats.phase("draw"):
+            self.draw_graph_in_gui(scene)
+        self.log(stats.report())
+        if self.metrics_path: export_metrics(self.metrics_path, [({"start": scene["labels"][0], "end": scene["labels"][-1]}, stats)])
 
-    def draw_graph_in_gui(self, G, path, pos):
+    def draw_graph_in_gui(self, scene):
         from matplotlib.figure import Figure
         from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-        import networkx as nx
 
         fig = Figure(figsize=(9, 5), facecolor='#2b2b2b')
         ax = fig.add_subplot(111)
-        ax.set_axis_off()
-
-        node_colors = []
-        node_sizes = []
-        node_alphas = []
-        path_set = set(path)
-        
-        for node in G.nodes():
-            if node in path_set:
-                node_colors.append('#f1c40f')
-                node_sizes.append(400)
-                node_alphas.append(1.0)
-            elif G.nodes[node].get('type') == 'start':
-                node_colors.append('#3498db')
-                node_sizes.append(300)
-                node_alphas.append(1.0)
-            elif G.nodes[node].get('type') == 'end':
-                node_colors.append('#e74c3c')
-                node_sizes.append(300)
-                node_alphas.append(1.0)
-            else:
-                node_colors.append('#95a5a6')
-                node_sizes.append(50)
-                node_alphas.append(0.3)
-
-        nx.draw_networkx_edges(G, pos, ax=ax, edge_color='#ecf0f1', alpha=0.1, width=0.5)
-        nx.draw_networkx_nodes(G, pos, ax=ax, node_color=node_colors, node_size=node_sizes, alpha=0.3)
-        
-        path_edges = list(zip(path, path[1:]))
-        path_nodes = list(path_set)
-        nx.draw_networkx_nodes(G, pos, ax=ax, nodelist=path_nodes, node_color='#f1c40f', node_size=400)
-        nx.draw_networkx_edges(G, pos, ax=ax, edgelist=path_edges, edge_color='#f1c40f', width=3.0)
-        
-        labels = {node: node for node in G.nodes() if node in path_set}
-        nx.draw_networkx_labels(G, pos, labels, ax=ax, font_size=9, font_color='white', font_weight='bold', font_family='Malgun Gothic')
+        draw_render_scene(ax, scene)
 
         canvas = FigureCanvasTkAgg(fig, master=self.canvas_frame)
         canvas.draw()
@@ -551,10 +2449,63 @@ class ModernWikiApp:
         toolbar = NavigationToolbar2Tk(canvas, self.toolbar_frame)
         toolbar.update()
         toolbar.pack(side="bottom", fill="x")
+        ctk.CTkButton(toolbar, text="그래프 저장", width=90, command=self.save_graph).pack(side="right", padx=5)
+
+    # 본 그래프를 파일로 - 나중에 --load-graph 로 다시 그리거나 캐시 채우기
+    def save_graph(self):
+        from tkinter import filedialog
+        out_path = filedialog.asksaveasfilename(defaultextension=".wsg", filetypes=[("탐색 그래프", "*.wsg"), ("압축", "*.z")])
+        if not out_path: return
+        G, path, stats = self.last_search
+        try: self.log(f" [저장] {out_path} ({save_search_graph(out_path, G, path, stats, compress=out_path.endswith('.z')) / 1024:.0f}KB)")
+        except OSError as e: self.log(f" [저장] 실패: {e}")
+
+    # 실시간 그래프 - 큐에 쌓인 걸 LIVE_REDRAW_MS 마다 한꺼번에 반영 (GUI 스레드에서만 그림)
+    def start_live_view(self, start, end):
+        self.stop_live_view()
+        for widget in self.canvas_frame.winfo_children(): widget.destroy()
+        for widget in self.toolbar_frame.winfo_children(): widget.destroy()
+        self.live_start, self.live_end = start, end
+        self.live_polling = True
+        self.live_after = self.root.after(LIVE_REDRAW_MS, self._poll_progress)
+
+    def stop_live_view(self):
+        self.live_polling = False
+        self.live_view = None
+        self._cancel_live_poll()
+
+    # 예약해 둔 폴링 취소 - 안 하면 다시 시작했을 때 예전 예약이 살아서 루프가 두 개 돎
+    def _cancel_live_poll(self):
+        if self.live_after is not None: self.root.after_cancel(self.live_after)
+        self.live_after = None
+
+    # 지난 탐색에서 남은 건 버림 (탐색 시작 전에 부르기 - 큐는 스레드 안전)
+    def clear_progress(self):
+        while not self.progress_queue.empty(): self.progress_queue.get_nowait()
+
+    def _finish_live_view(self):
+        self._cancel_live_poll()
+        self._poll_progress(again=False)
+        self.live_polling = False
+
+    def _poll_progress(self, again=True):
+        self.live_after = None
+        if not self.live_polling: return
+        updates = []
+        while not self.progress_queue.empty(): updates.append(self.progress_queue.get_nowait())
+        if updates:
+            if self.live_view is None:
+                self.show_graph_panel()
+                self.live_view = LiveGraphView(self.canvas_frame, self.live_start, self.live_end)
+            for update in updates: self.live_view.add(update)
+            self.live_view.redraw()
+        if again: self.live_after = self.root.after(LIVE_REDRAW_MS, self._poll_progress)
 
     def reset_button(self):
         self.stop_spinner()
         self.root.after(0, lambda: self.btn_run.configure(state="normal", text="탐색 시작"))
+        self.root.after(0, lambda: self.btn_cancel.configure(state="disabled"))
+        self.root.after(0, self._finish_live_view)
 
     def run(self):
         self.root.mainloop()
@@ -562,12 +2513,102 @@ class ModernWikiApp:
 
 # 실행ㄱㄱ 
 if __name__ == "__main__":
-    try:
-        import customtkinter
-        import matplotlib
-    except ImportError:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "customtkinter", "matplotlib"])
-        import customtkinter
-    
-    app = ModernWikiApp()
+    import argparse
+    parser = argparse.ArgumentParser(description="위키백과 6단계 법칙 탐색기")
+    parser.add_argument("--offline", metavar="CSR", help="덤프로 만든 오프라인 그래프 파일로 탐색 (네트워크 안 씀)")
+    parser.add_argument("--build-offline", nargs=2, metavar=("PAGE", "PAGELINKS"), help="page / pagelinks 덤프(.sql[.gz] 또는 .tsv[.gz])를 CSR 파일로 변환")
+    parser.add_argument("--linktarget", metavar="DUMP", help="새 형식 pagelinks 용 linktarget 덤프")
+    parser.add_argument("--redirect", metavar="DUMP", help="넘겨주기(redirect) 덤프")
+    parser.add_argument("--search", nargs=2, metavar=("START", "END"), help="GUI 없이 한 쌍 탐색하고 JSON 출력")
+    parser.add_argument("--pairs", metavar="FILE", help="GUI 없이 '시작<TAB>목표' 줄 파일 전부 탐색 (- 면 표준입력)")
+    parser.add_argument("--distances", metavar="SOURCE", help="GUI 없이 SOURCE 에서 --targets 목표들까지 거리 (찾는 대로 JSON 한 줄씩)")
+    parser.add_argument("--targets", metavar="FILE", help="--distances 목표 파일 (한 줄에 제목 하나, - 면 표준입력)")
+    parser.add_argument("--max-depth", type=int, default=MAX_EXPANSIONS, metavar="N", help=f"--distances 정방향 단계 상한 (기본 {MAX_EXPANSIONS})")
+    parser.add_argument("--backward-depth", type=int, default=0, metavar="K", help="--distances 목표들에서 먼저 역방향으로 볼 단계 수 (기본 0)")
+    parser.add_argument("--jobs", type=int, default=4, help="동시에 탐색할 쌍 수 (기본 4)")
+    parser.add_argument("--timeout", type=float, metavar="SEC", help="쌍마다 탐색 시간 제한 (넘으면 중단하고 path=null)")
+    parser.add_argument("--max-requests", type=int, metavar="N", help="쌍마다 API 요청 수 제한")
+    parser.add_argument("--verify", action="store_true", help="찾은 경로의 링크가 실제 문서 본문에 있는지 HTML 로 확인 (결과에 verified)")
+    parser.add_argument("--save-graph", metavar="FILE", help="--search 로 탐색한 그래프를 바이너리 파일로 저장 (.z 로 끝나면 zlib 압축)")
+    parser.add_argument("--load-graph", action="append", metavar="FILE", help="저장한 탐색 그래프로 링크 캐시 / 결과 캐시 채우고 시작 (여러 번 가능)")
+    parser.add_argument("--render", metavar="PNG", help="--load-graph 로 불러온 (첫) 그래프를 PNG 로 그리고 끝냄")
+    parser.add_argument("--workers", type=int, default=0, metavar="N", help="큰 프론티어를 N개 프로세스로 나눠서 받기/파싱 (기본 0 = 안 씀)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="탐색 로그를 stderr 로 출력")
+    parser.add_argument("--bench", action="store_true", help="로컬 가짜 API 서버로 벤치마크 실행")
+    parser.add_argument("--bench-graph", metavar="CSR", help="벤치마크에 쓸 그래프 (기본: 합성 그래프 2만 문서)")
+    parser.add_argument("--bench-latency", type=float, default=20, metavar="MS", help="가짜 서버 응답 지연 (기본 20ms)")
+    parser.add_argument("--bench-page-limit", type=int, default=500, metavar="N", help="응답 한 번에 주는 링크 수 (기본 500)")
+    parser.add_argument("--baseline", metavar="FILE", help="이 기준 결과(JSON)랑 비교")
+    parser.add_argument("--save-baseline", metavar="FILE", help="결과를 기준 파일로 저장")
+    parser.add_argument("--hubs", nargs="?", const=HUB_DB, metavar="DB", help="허브 색인으로 탐색 가속 (기본 위치: 프로그램 폴더)")
+    parser.add_argument("--hubs-fast", action="store_true", help="허브 경로를 찾으면 더 짧은 경로 확인 없이 바로 사용")
+    parser.add_argument("--refresh-hubs", nargs="*", metavar="TITLE", help="허브 색인 만들기/갱신 (제목 안 주면 기본 허브 목록, 오래된 것만 다시 받음)")
+    parser.add_argument("--metrics", metavar="FILE", help="탐색 측정값 저장 (.prom = Prometheus 텍스트, 그 외 JSON)")
+    parser.add_argument("--api", metavar="URL", help=f"API 주소 바꾸기 (기본 {API})")
+    parser.add_argument("--import-times", action="store_true", help="무거운 모듈 import 시간 측정")
+    parser.add_argument("-o", "--output", help="결과 파일 (변환: 기본 kowiki.csr / 탐색: 기본 stdout, JSON 줄)")
+    args = parser.parse_args()
+
+    if args.import_times:
+        measure_import_times()
+        sys.exit(0)
+
+    if args.build_offline:
+        try: build_offline_graph(args.build_offline[0], args.build_offline[1], args.output or "kowiki.csr", linktarget_dump=args.linktarget, redirect_dump=args.redirect)
+        except ValueError as e: sys.exit(f" [오프라인] 변환 실패: {e}")
+        sys.exit(0)
+
+    if args.api: API = args.api
+    if args.workers > 1: use_shard_workers(args.workers)
+
+    if args.refresh_hubs is not None:
+        HubIndex(args.hubs or HUB_DB).refresh(args.refresh_hubs or HUBS)
+        sys.exit(0)
+    if args.hubs_fast: HUB_VERIFY = False
+    hubs = HubIndex(args.hubs) if args.hubs else None
+
+    if args.bench:
+        result = run_benchmark(OfflineGraph(args.bench_graph) if args.bench_graph else None, latency=args.bench_latency / 1000, page_limit=args.bench_page_limit)
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f: compare_benchmark(result, json.load(f))
+        if args.save_baseline:
+            with open(args.save_baseline, "w", encoding="utf-8") as f: json.dump(result, f, ensure_ascii=False, indent=1)
+        sys.exit(0)
+    graph = OfflineGraph(args.offline) if args.offline else None
+    if args.save_graph and not args.search: parser.error("--save-graph 는 --search 랑 같이 써야 합니다")
+    if args.render and not args.load_graph: parser.error("--render 는 --load-graph 랑 같이 써야 합니다")
+    for saved_path in args.load_graph or []:
+        saved = SavedSearchGraph(saved_path)
+        if args.render:
+            saved.render(args.render)
+            sys.exit(0)
+        print(f" [불러오기] {saved_path}: 문서 {saved.n}개, 링크 {saved.e}개, 캐시에 넣은 문서 {saved.seed()}개", file=sys.stderr)
+
+    if args.distances:
+        if not args.targets: parser.error("--distances 는 --targets 랑 같이 써야 합니다")
+        if graph is not None: parser.error("--distances 는 --offline 이랑 같이 못 씁니다")
+        log_func = (lambda message: print(message, file=sys.stderr)) if args.verbose else (lambda message: None)
+        out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+        def write_result(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n"); out.flush()
+        targets = read_titles(args.targets)
+        try: results = find_distances_from(args.distances, targets, log_func, args.max_depth, write_result, args.backward_depth, cancel=CancelToken(args.timeout, args.max_requests))
+        finally:
+            if out is not sys.stdout: out.close()
+        # 목표마다 결과가 있고 전부 거리가 나왔을 때만 성공
+        sys.exit(0 if len(results) == len(set(targets)) and all(record["distance"] is not None for record in results.values()) else 1)
+
+    if args.search or args.pairs:
+        pairs = [tuple(args.search)] if args.search else read_pairs(args.pairs)
+        log_func = (lambda message: print(message, file=sys.stderr)) if args.verbose else None
+        out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+        try: found = run_batch(pairs, out, jobs=args.jobs, graph=graph, log_func=log_func, metrics_path=args.metrics, timeout=args.timeout, max_requests=args.max_requests, hubs=hubs, verify=args.verify, save_graph=args.save_graph)
+        finally:
+            if out is not sys.stdout: out.close()
+        sys.exit(0 if found == len(pairs) else 1)
+
+    if not install_packages(PACKAGES, print): print(" 필수 패키지 설치 실패 - 일부 기능이 동작하지 않을 수 있습니다.")
+    load_gui_modules()
+
+    app = ModernWikiApp(offline_graph=graph, metrics_path=args.metrics, hub_index=hubs)
     app.run()